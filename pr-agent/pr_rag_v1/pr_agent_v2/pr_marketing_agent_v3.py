@@ -2,15 +2,17 @@
 """
 主程序：基于 RAG（LlamaIndex 0.11.x + Chroma + Neo4j）与 LiteLLM 的六类产出生成器
 """
-import os, json, argparse, datetime as dt, pathlib
-from typing import Dict, Any, List, Tuple
+import os, json, math, argparse, atexit, datetime as dt, pathlib
+from typing import Dict, Any, List, Tuple, AsyncIterator
 
 import yaml
-from litellm import completion
+from litellm import completion, acompletion
 import matplotlib.pyplot as plt
 from PIL import Image, ImageDraw
 
 from llama_index.core import VectorStoreIndex
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.utils import metadata_dict_to_node, legacy_metadata_dict_to_node
 from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 try:
     from llama_index.vector_stores.chroma import ChromaVectorStore
@@ -18,6 +20,11 @@ except Exception:
     ChromaVectorStore = None
 import chromadb
 from neo4j import GraphDatabase
+# 可选：orjson序列化更快，原生输出非ASCII字符
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from docx import Document
 from docx.shared import Inches
@@ -25,8 +32,8 @@ from pptx import Presentation
 from pptx.util import Inches, Pt
 
 from templates.prompts import (
-    A_GRAPHIC_BRIEF, B_VIDEO_SCRIPT, C_CAMPAIGN_PLAN,
-    D_SHORTVIDEO_SCRIPT, E_XHS_NOTE, F_CRISIS_PLAN
+    render_shared_context, A_GRAPHIC_TASK, B_VIDEO_TASK, C_CAMPAIGN_TASK,
+    D_SHORTVIDEO_TASK, E_XHS_TASK, F_CRISIS_TASK
 )
 
 def get_storage_context_with_chroma(persist_dir: str = "./chroma_db", collection_name: str = "pr_agent"):
@@ -55,18 +62,66 @@ def read_config() -> Dict[str, Any]:
     cfg_path = "config.yaml" if os.path.exists("config.yaml") else "config.example.yaml"
     return yaml.safe_load(open(cfg_path, "r", encoding="utf-8"))
 
+# fetch_graph 的类别：rel为None表示直接取策略节点本身
+GRAPH_CATEGORIES = [
+    {"key": "strategies", "rel": None, "label": "Strategy", "prop": "title"},
+    {"key": "channels", "rel": "USES", "label": "Channel", "prop": "name"},
+    {"key": "cases", "rel": "ILLUSTRATED_BY", "label": "CaseStudy", "prop": "title"},
+    {"key": "personas", "rel": "APPLIES_TO", "label": "Persona", "prop": "name"},
+]
+
+FETCH_GRAPH_CYPHER = """
+UNWIND $cats AS cat
+CALL {
+    WITH cat
+    MATCH (:PRGoal {name:$goal})-[:INCLUDES]->(s:Strategy)
+    OPTIONAL MATCH (s)-[r]->(m)
+    WHERE cat.rel IS NOT NULL AND type(r) = cat.rel AND cat.label IN labels(m)
+    WITH CASE WHEN cat.rel IS NULL THEN s[cat.prop] ELSE m[cat.prop] END AS item
+    RETURN collect(DISTINCT item) AS items
+}
+RETURN cat.key AS cat, items
+"""
+
+# 进程内共享的Neo4j驱动（按连接参数区分），多个GraphRAG实例复用同一个连接池，进程退出时关闭
+NEO4J_DRIVER_CONFIG = {
+    "max_connection_pool_size": int(os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", "200")),
+    "connection_acquisition_timeout": 60,
+}
+_SHARED_DRIVERS: Dict[Tuple[str, str], Any] = {}
+
+def get_shared_driver(neo4j_uri: str, neo4j_user: str, neo4j_pwd: str):
+    key = (neo4j_uri, neo4j_user)
+    if key not in _SHARED_DRIVERS:
+        driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_pwd), **NEO4J_DRIVER_CONFIG)
+        atexit.register(driver.close)
+        _SHARED_DRIVERS[key] = driver
+    return _SHARED_DRIVERS[key]
+
 class GraphRAG:
-    def __init__(self, persist_dir: str, neo4j_uri: str, neo4j_user: str, neo4j_pwd: str, top_k: int = 10):
+    def __init__(self, persist_dir: str, neo4j_uri: str, neo4j_user: str, neo4j_pwd: str, top_k: int = 10, driver=None):
+        # driver: 外部注入的共享驱动，由调用方管理生命周期；未提供时自建并在close()中关闭
         self.client = chromadb.PersistentClient(path=persist_dir)
         self.coll = self.client.get_or_create_collection("pr_kb_v3")
         self.vector_store = ChromaVectorStore(chroma_collection=self.coll)
         self.embed_model = HuggingFaceEmbedding(model_name="BAAI/bge-m3")
         self.index = VectorStoreIndex.from_vector_store(self.vector_store, embed_model=self.embed_model, show_progress=False)
         self.retriever = self.index.as_retriever(similarity_top_k=top_k)
-        self.driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_pwd))
+        self._owns_driver = driver is None
+        self.driver = driver if driver is not None else GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_pwd))
+        self.ensure_indexes()
+
+    def ensure_indexes(self):
+        # fetch_graph 按名称查找 PRGoal，建索引避免标签扫描
+        try:
+            with self.driver.session() as s:
+                s.run("CREATE INDEX pr_goal_name IF NOT EXISTS FOR (g:PRGoal) ON (g.name)").consume()
+        except Exception as e:
+            print(f"[WARN] create PRGoal index failed: {e}")
 
     def close(self):
-        self.driver.close()
+        if self._owns_driver:
+            self.driver.close()
 
     def retrieve(self, query: str, k: int = 10) -> List[Dict[str, Any]]:
         nodes = self.retriever.retrieve(query)[:k]
@@ -76,32 +131,91 @@ class GraphRAG:
             out.append({"text": n.node.get_content(), "score": float(getattr(n, "score", 0.0)), "meta": meta})
         return out
 
+    def retrieve_batch(self, queries: List[str], k: int = 10) -> List[List[Dict[str, Any]]]:
+        """多个查询一次检索：查询向量批量计算，Chroma只查询一次；返回与queries一一对应的命中列表"""
+        if not queries:
+            return []
+        # 使用与 retrieve 相同的向量模型（query_texts会改用Chroma默认的向量函数，与库中向量不一致）；
+        # 所有查询一次批量编码，查询指令与 get_query_embedding 一致（bge-m3 为空）
+        instruction = getattr(self.embed_model, "query_instruction", None) or ""
+        embeddings = self.embed_model.get_text_embedding_batch([f"{instruction}{q}" for q in queries])
+        res = self.coll.query(query_embeddings=embeddings, n_results=k, include=["documents", "metadatas", "distances"])
+        out = []
+        for ids, docs, metas, dists in zip(res["ids"], res["documents"], res["metadatas"], res["distances"]):
+            hits = []
+            for node_id, doc, meta, dist in zip(ids, docs, metas, dists):
+                # 与 ChromaVectorStore._query 一致：正文存在 documents 中，_node_content 里的正文已被去掉
+                try:
+                    node = metadata_dict_to_node(meta or {})
+                    node.set_content(doc)
+                except Exception:
+                    # 旧版元数据格式
+                    metadata, _, relationships = legacy_metadata_dict_to_node(meta or {})
+                    node = TextNode(text=doc, id_=node_id, metadata=metadata, relationships=relationships)
+                # 距离转换为相似度 exp(-distance)
+                hits.append({"text": node.get_content(), "score": math.exp(-dist), "meta": node.metadata or {}})
+            out.append(hits)
+        return out
+
     def fetch_graph(self, goal: str) -> Dict[str, List[str]]:
-        cypher = """
-        OPTIONAL MATCH (g:PRGoal {name:$goal})-[:INCLUDES]->(s:Strategy)
-        OPTIONAL MATCH (s)-[:USES]->(c:Channel)
-        OPTIONAL MATCH (s)-[:ILLUSTRATED_BY]->(cs:CaseStudy)
-        OPTIONAL MATCH (s)-[:APPLIES_TO]->(p:Persona)
-        RETURN collect(DISTINCT s.title) AS strategies,
-               collect(DISTINCT c.name) AS channels,
-               collect(DISTINCT cs.title) AS cases,
-               collect(DISTINCT p.name) AS personas
-        """
+        # 四类信息在一次查询中按类别分别收集，避免多个 OPTIONAL MATCH 串联产生的笛卡尔积
         with self.driver.session() as s:
-            rec = s.run(cypher, goal=goal).single()
-            if not rec:
-                return {"strategies": [], "channels": [], "cases": [], "personas": []}
-            return {k: [x for x in rec[k] if x] for k in ["strategies","channels","cases","personas"]}
+            rows = s.run(FETCH_GRAPH_CYPHER, goal=goal, cats=GRAPH_CATEGORIES).data()
+        out = {cat["key"]: [] for cat in GRAPH_CATEGORIES}
+        for row in rows:
+            out[row["cat"]] = [x for x in row["items"] if x]
+        return out
 
-def llm_complete(provider: str, model: str, prompt: str, max_tokens=2048, temperature=0.6) -> str:
+def iter_context_pieces(vec_hits: List[Dict[str, Any]], g: Dict[str, List[str]]):
+    """依次生成上下文片段（含片段间的分隔符），调用方用完预算即停止，后面的片段不再格式化"""
+    for i, h in enumerate(vec_hits, 1):
+        src = h["meta"].get("source", "") if isinstance(h["meta"], dict) else ""
+        yield f"[{i}] {h['text'][:800]}\n— 来源：{src}"
+        yield "\n\n"
+    yield f"策略: {g.get('strategies', [])}\n渠道: {g.get('channels', [])}\n案例: {g.get('cases', [])}\n人群: {g.get('personas', [])}"
+
+def build_context(vec_hits: List[Dict[str, Any]], g: Dict[str, List[str]], max_chars: int) -> str:
+    """拼接上下文时即按 max_chars（字符数）控制长度，不先拼出完整字符串再截断；结果与 join 后切片一致"""
+    parts, remaining = [], max_chars
+    for piece in iter_context_pieces(vec_hits, g):
+        if len(piece) >= remaining:
+            parts.append(piece[:remaining])
+            break
+        parts.append(piece)
+        remaining -= len(piece)
+    return "".join(parts)
+
+def build_messages(provider: str, prompt: str, prefix: str = None) -> List[Dict[str, Any]]:
+    """prefix: 多次调用共用的前缀（上下文），放在最前面以命中服务端前缀缓存；Anthropic需显式标记 cache_control，OpenAI自动缓存"""
+    if not prefix:
+        return [{"role":"user","content":prompt}]
+    if provider == "anthropic":
+        system = [{"type":"text","text":prefix,"cache_control":{"type":"ephemeral"}}]
+    else:
+        system = prefix
+    return [{"role":"system","content":system}, {"role":"user","content":prompt}]
+
+def llm_complete(provider: str, model: str, prompt: str, max_tokens=2048, temperature=0.6, prefix: str = None, fallback: bool = True) -> str:
+    """fallback: 响应中取不到文本时返回整个响应的JSON；为False时抛出ValueError（供需要区分正常文本的调用方，如缓存）"""
     model_id = model if "/" in model else f"{provider}/{model}"
-    rsp = completion(model=model_id, messages=[{"role":"user","content":prompt}], max_tokens=max_tokens, temperature=temperature)
+    rsp = completion(model=model_id, messages=build_messages(provider, prompt, prefix), max_tokens=max_tokens, temperature=temperature)
     try:
         return rsp.choices[0].message["content"]
     except Exception:
+        if not fallback:
+            raise ValueError(f"LLM响应中没有文本: {rsp!r}")
         import json as _json
         return _json.dumps(rsp, ensure_ascii=False)
 
+async def llm_complete_stream(provider: str, model: str, prompt: str, max_tokens=2048, temperature=0.6, prefix: str = None) -> AsyncIterator[str]:
+    """流式版本的 llm_complete：逐块产出生成的文本，首个token到达即可输出"""
+    model_id = model if "/" in model else f"{provider}/{model}"
+    rsp = await acompletion(model=model_id, messages=build_messages(provider, prompt, prefix), max_tokens=max_tokens, temperature=temperature, stream=True)
+    async for chunk in rsp:
+        text = chunk.choices[0].delta.content
+        if text:
+            yield text
+
 def save_graphics_placeholders(out_dir: str, campaign_name: str, count: int = 3):
     w, h = 3508, 4961
     for i in range(1, count+1):
@@ -163,40 +277,38 @@ def main():
     vec_hits = rag.retrieve(query, k=cfg["retrieval"]["top_k"])
     g = rag.fetch_graph(args.pr_goal)
 
-    ctx_parts = []
-    for i, h in enumerate(vec_hits, 1):
-        src = h["meta"].get("source", "") if isinstance(h["meta"], dict) else ""
-        ctx_parts.append(f"[{i}] {h['text'][:800]}\n— 来源：{src}")
-    graph_part = f"策略: {g.get('strategies', [])}\n渠道: {g.get('channels', [])}\n案例: {g.get('cases', [])}\n人群: {g.get('personas', [])}"
-    context = "\n\n".join(ctx_parts + [graph_part])[: cfg["retrieval"]["max_context_chars"]]
+    context = build_context(vec_hits, g, cfg["retrieval"]["max_context_chars"])
 
-    vars_text = json.dumps({
+    info = {
         "企业名称": args.enterprise_name,
         "企业类型": {"阶段": args.enterprise_stage, "行业": args.industry, "市场": args.market_type},
         "公关目标": args.pr_goal, "公关周期": args.pr_cycle, "公关预算": args.pr_budget, "创新程度": args.innovation
-    }, ensure_ascii=False)
+    }
+    vars_text = orjson.dumps(info).decode("utf-8") if orjson is not None else json.dumps(info, ensure_ascii=False, separators=(",", ":"))
 
     provider = cfg["llm"]["provider"]; model = cfg["llm"]["model"]
     max_tokens = int(cfg["llm"].get("max_tokens", 2048)); temperature = float(cfg["llm"].get("temperature", 0.6))
     want = [x.strip().upper() for x in args.outputs.split(",") if x.strip()]
+    # 上下文只渲染一次，作为各产出共用的前缀
+    shared = render_shared_context(context=context, vars=vars_text)
 
     # A
     if "A" in want:
         a_dir = os.path.join(out_dir, "A_graphics"); ensure_dir(a_dir)
-        brief = llm_complete(provider, model, A_GRAPHIC_BRIEF.format(context=context, vars=vars_text), max_tokens, temperature)
+        brief = llm_complete(provider, model, A_GRAPHIC_TASK, max_tokens, temperature, prefix=shared)
         open(os.path.join(a_dir, "A_brief.md"), "w", encoding="utf-8").write(brief)
         save_graphics_placeholders(a_dir, args.enterprise_name, 3)
 
     # B
     if "B" in want:
         b_dir = os.path.join(out_dir, "B_corp_video"); ensure_dir(b_dir)
-        script = llm_complete(provider, model, B_VIDEO_SCRIPT.format(context=context, vars=vars_text), max_tokens, temperature)
+        script = llm_complete(provider, model, B_VIDEO_TASK, max_tokens, temperature, prefix=shared)
         open(os.path.join(b_dir, "B_script_shotlist.md"), "w", encoding="utf-8").write(script)
 
     # C
     if "C" in want:
         c_dir = os.path.join(out_dir, "C_campaign_plan"); ensure_dir(c_dir)
-        outline = llm_complete(provider, model, C_CAMPAIGN_PLAN.format(context=context, vars=vars_text), max_tokens, temperature)
+        outline = llm_complete(provider, model, C_CAMPAIGN_TASK, max_tokens, temperature, prefix=shared)
         budgets = {"品牌传播":40, "内容制作":35, "投放":20, "监测评估":5}
         budget_png = os.path.join(c_dir, "budget.png"); plot_budget_pie(budgets, budget_png)
         gantt = [("预热", 2), ("爆发", 6), ("延续", 6), ("复盘", 2)]
@@ -209,19 +321,19 @@ def main():
     # D
     if "D" in want:
         d_dir = os.path.join(out_dir, "D_shortvideo"); ensure_dir(d_dir)
-        sc = llm_complete(provider, model, D_SHORTVIDEO_SCRIPT.format(context=context, vars=vars_text), max_tokens, temperature)
+        sc = llm_complete(provider, model, D_SHORTVIDEO_TASK, max_tokens, temperature, prefix=shared)
         open(os.path.join(d_dir, "D_shortvideo_scripts.md"), "w", encoding="utf-8").write(sc)
 
     # E
     if "E" in want:
         e_dir = os.path.join(out_dir, "E_xiaohongshu"); ensure_dir(e_dir)
-        note = llm_complete(provider, model, E_XHS_NOTE.format(context=context, vars=vars_text), max_tokens, temperature)
+        note = llm_complete(provider, model, E_XHS_TASK, max_tokens, temperature, prefix=shared)
         open(os.path.join(e_dir, "E_note.md"), "w", encoding="utf-8").write(note)
 
     # F
     if "F" in want:
         f_dir = os.path.join(out_dir, "F_crisis_plan"); ensure_dir(f_dir)
-        outline = llm_complete(provider, model, F_CRISIS_PLAN.format(context=context, vars=vars_text), max_tokens, temperature)
+        outline = llm_complete(provider, model, F_CRISIS_TASK, max_tokens, temperature, prefix=shared)
         budgets = {"监测与分析":25, "媒体与社区沟通":35, "内容制作":25, "培训演练":15}
         budget_png = os.path.join(f_dir, "budget.png"); plot_budget_pie(budgets, budget_png)
         gantt = [("第一响应", 1), ("沟通与澄清", 2), ("修复与重建", 4), ("复盘优化", 1)]
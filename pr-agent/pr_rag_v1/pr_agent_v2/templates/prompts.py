@@ -1,46 +1,67 @@
 # -*- coding: utf-8 -*-
-A_GRAPHIC_BRIEF = """你是一名资深创意总监。基于以下企业信息与知识库上下文，输出「平面广告/包装/IP周边」的系列创意Brief：
+import string
+
+# 六类产出共用同一段上下文与企业信息。*_TASK 只含任务说明，措辞指向前面已给出的上下文；
+# 需要利用模型服务端前缀缓存时，先发送渲染一次的 SHARED_CONTEXT（作为系统消息），再发送各自的任务说明。
+SHARED_CONTEXT = """上下文：
+{context}
+企业信息：{vars}
+"""
+
+A_GRAPHIC_TASK = """你是一名资深创意总监。基于上文（或系统消息中）给出的企业信息与知识库上下文，输出「平面广告/包装/IP周边」的系列创意Brief：
 1) 主题与Slogan（中文+英文）
 2) 视觉要素（主视觉、配色、材质/工艺建议）
 3) 版式与投放场景（海报/长图/路牌/杂志等）
 4) Midjourney/SDXL 提示词（中文+英文，含相机/光线/风格标签）
 5) 系列化延展（至少3个）
-上下文：
-{context}
-企业信息：{vars}
 """
-B_VIDEO_SCRIPT = """你是一名广告导演。根据企业信息与知识库上下文，输出 3~5 分钟企业宣传片：
+B_VIDEO_TASK = """你是一名广告导演。根据上文（或系统消息中）给出的企业信息与知识库上下文，输出 3~5 分钟企业宣传片：
 - 分镜（镜号/景别/时长/画面/旁白/字幕/音效BGM）+ 结构（开场-主体-收束）+ 视听风格建议
 - 横屏16:9，可直接用于文生视频工具
-上下文：
-{context}
-企业信息：{vars}
 """
-C_CAMPAIGN_PLAN = """你是公关策略负责人。基于上下文与企业信息，输出标准方案（Word/PPT 结构）：
+C_CAMPAIGN_TASK = """你是公关策略负责人。基于上文（或系统消息中）给出的上下文与企业信息，输出标准方案（Word/PPT 结构）：
 - 背景&洞察（SWOT/PEST）/目标/策略矩阵/创意表现/媒体投放/落地执行/时间甘特图要点/预算分配/指标设定
 - 引用案例与渠道建议
-上下文：
-{context}
-企业信息：{vars}
 """
-D_SHORTVIDEO_SCRIPT = """你是短视频编导。结合上下文与企业信息输出：
+D_SHORTVIDEO_TASK = """你是短视频编导。结合上文（或系统消息中）给出的上下文与企业信息输出：
 - A) 15s 与 30s 横屏广告分镜
 - B) 60~180s 微电影（可做系列小剧场，≤3集）
 - C) 15~60s 竖屏内容（9:16~9:20），适配热门梗或母题，给出「借势点」
-上下文：
-{context}
-企业信息：{vars}
 """
-E_XHS_NOTE = """你是小红书资深博主。写一篇爆款笔记：
+E_XHS_TASK = """你是小红书资深博主。结合上文（或系统消息中）给出的上下文与企业信息，写一篇爆款笔记：
 - 标题（3条候选）+ 正文（100-500字）+ 配图创意（6~8张提示）+ 话题标签（10个）
-上下文：
-{context}
-企业信息：{vars}
 """
-F_CRISIS_PLAN = """你是危机公关专家。输出应对方案：
+F_CRISIS_TASK = """你是危机公关专家。结合上文（或系统消息中）给出的上下文与企业信息，输出应对方案：
 - 时间线回溯/舆情现状与趋势/目标/应对策略与话术/响应机制/时间甘特图要点/复盘要点
 - 分角色SOP
-上下文：
-{context}
-企业信息：{vars}
 """
+
+# 完整单条prompt（上下文 + 任务说明），上下文在前，与任务说明中「上文」的指代一致
+A_GRAPHIC_BRIEF = SHARED_CONTEXT + A_GRAPHIC_TASK
+B_VIDEO_SCRIPT = SHARED_CONTEXT + B_VIDEO_TASK
+C_CAMPAIGN_PLAN = SHARED_CONTEXT + C_CAMPAIGN_TASK
+D_SHORTVIDEO_SCRIPT = SHARED_CONTEXT + D_SHORTVIDEO_TASK
+E_XHS_NOTE = SHARED_CONTEXT + E_XHS_TASK
+F_CRISIS_PLAN = SHARED_CONTEXT + F_CRISIS_TASK
+
+def compile_template(template: str):
+    """导入时把模板按占位符切分为静态片段，返回只做字符串拼接的渲染函数（不再每次调用都解析格式串）
+    仅支持不带格式说明的具名占位符，如 {context}"""
+    segments = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if spec or conversion:
+            raise ValueError(f"不支持带格式说明的占位符: {field}")
+        segments.append((literal, field))
+
+    def render(**values) -> str:
+        parts = []
+        for literal, field in segments:
+            parts.append(literal)
+            if field is not None:
+                parts.append(values[field])
+        return "".join(parts)
+
+    return render
+
+# 共用前缀的预编译渲染函数：render_shared_context(context=..., vars=...)
+render_shared_context = compile_template(SHARED_CONTEXT)
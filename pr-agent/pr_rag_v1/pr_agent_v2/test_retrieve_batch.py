@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+GraphRAG.retrieve_batch 测试
+- 单元测试：桩向量模型 + 桩Chroma集合，不需要外部服务
+- 集成测试：与逐条 retrieve 的结果一致（需要已建好的 Chroma 库与 Neo4j，不可用时跳过）
+"""
+import math
+
+import pytest
+
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
+from pr_marketing_agent_v3 import GraphRAG, read_config
+
+QUERIES = [
+    "初创企业 新能源汽车 ToC 目标:品牌认知 创新:适度创新",
+    "大型国企央企 能源 ToG 目标:危机公关 创新:保守",
+]
+
+class StubEmbedModel:
+    """桩向量模型：记录调用，只允许批量编码"""
+    query_instruction = "查询："
+
+    def __init__(self):
+        self.batches = []
+
+    def get_text_embedding_batch(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def get_query_embedding(self, query):
+        raise AssertionError("retrieve_batch 不应逐条计算查询向量")
+
+class StubCollection:
+    """桩Chroma集合：按 ChromaVectorStore 的存储格式返回命中（正文在 documents 中）"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+
+    def query(self, query_embeddings, n_results, include):
+        self.calls.append((query_embeddings, n_results, include))
+        ids, documents, metadatas, distances = [], [], [], []
+        for qi, _ in enumerate(query_embeddings):
+            hits = self.docs[qi::len(query_embeddings)][:n_results]
+            ids.append([node.id_ for node, _ in hits])
+            documents.append([node.get_content() for node, _ in hits])
+            metadatas.append([node_to_metadata_dict(node, remove_text=True, flat_metadata=True) for node, _ in hits])
+            distances.append([dist for _, dist in hits])
+        return {"ids": ids, "documents": documents, "metadatas": metadatas, "distances": distances}
+
+def make_stub_rag(docs):
+    rag = GraphRAG.__new__(GraphRAG)
+    rag.embed_model = StubEmbedModel()
+    rag.coll = StubCollection(docs)
+    return rag
+
+def test_retrieve_batch_embeds_once_and_queries_once():
+    docs = [
+        (TextNode(text="新能源汽车品牌发布会案例", metadata={"source": "a.pdf"}), 0.2),
+        (TextNode(text="能源央企危机公关案例", metadata={"source": "b.pdf"}), 0.5),
+        (TextNode(text="小红书种草投放复盘", metadata={"source": "c.pdf"}), 0.7),
+    ]
+    rag = make_stub_rag(docs)
+
+    out = rag.retrieve_batch(QUERIES, k=2)
+
+    assert rag.embed_model.batches == [[f"查询：{q}" for q in QUERIES]]
+    assert len(rag.coll.calls) == 1
+    embeddings, n_results, include = rag.coll.calls[0]
+    assert len(embeddings) == len(QUERIES) and n_results == 2
+    assert include == ["documents", "metadatas", "distances"]
+
+    assert len(out) == len(QUERIES)
+    assert [h["text"] for h in out[0]] == ["新能源汽车品牌发布会案例", "小红书种草投放复盘"]
+    assert [h["text"] for h in out[1]] == ["能源央企危机公关案例"]
+    assert out[0][0]["meta"] == {"source": "a.pdf"}
+    assert math.isclose(out[0][0]["score"], math.exp(-0.2))
+
+def test_retrieve_batch_empty_queries():
+    rag = make_stub_rag([])
+    assert rag.retrieve_batch([], k=3) == []
+    assert rag.embed_model.batches == [] and rag.coll.calls == []
+
+@pytest.fixture
+def live_rag():
+    cfg = read_config()
+    k = cfg["retrieval"]["top_k"]
+    try:
+        rag = GraphRAG(
+            persist_dir=cfg["paths"]["persist_dir"],
+            neo4j_uri=cfg["neo4j"]["uri"],
+            neo4j_user=cfg["neo4j"]["user"],
+            neo4j_pwd=cfg["neo4j"]["password"],
+            top_k=k,
+        )
+        rag.driver.verify_connectivity()
+    except Exception as e:
+        pytest.skip(f"Chroma/Neo4j 不可用: {e}")
+    if rag.coll.count() == 0:
+        rag.close()
+        pytest.skip("Chroma 库为空")
+    yield rag, k
+    rag.close()
+
+def test_retrieve_batch_matches_retrieve(live_rag):
+    rag, k = live_rag
+    for q in QUERIES:
+        single = rag.retrieve(q, k=k)
+        batch = rag.retrieve_batch([q], k=k)[0]
+        assert len(batch) == len(single)
+        for a, b in zip(batch, single):
+            assert a["text"] == b["text"]
+            assert a["text"], "命中正文为空"
+            assert a["meta"] == b["meta"]
+            assert math.isclose(a["score"], b["score"], rel_tol=1e-4)
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -7,7 +7,6 @@
 import json
 import os
 from pathlib import Path
-from dotenv import load_dotenv
 from langchain_community.graphs import Neo4jGraph
 from langchain_openai import OpenAIEmbeddings
 from pr_neo4j_env import *
@@ -93,42 +92,53 @@ class EnhancedPRNeo4jIntegration:
         total_relationships = 0
         
         for chunk_file in chunk_files:
-            print(f"📄 处理文件: {chunk_file.name}")
-            
-            try:
-                with open(chunk_file, 'r', encoding='utf-8') as f:
-                    chunks_data = json.load(f)
-                
-                for chunk in chunks_data:
-                    # 提取实体和关系
-                    processed_chunk = self.extractor.process_chunk(chunk)
-                    
-                    # 创建PR_Chunk节点
-                    self._create_chunk_node(processed_chunk)
-                    
-                    # 创建实体节点
-                    entities_created = self._create_entity_nodes(processed_chunk['entities'])
-                    total_entities += entities_created
-                    
-                    # 创建关系
-                    relationships_created = self._create_relationships(
-                        processed_chunk['relationships'], 
-                        processed_chunk['entities']
-                    )
-                    total_relationships += relationships_created
-                    
-                    self.stats['chunks_processed'] += 1
-                
-                print(f"✅ {chunk_file.name}: {len(chunks_data)} chunks processed")
-                
-            except Exception as e:
-                print(f"❌ 处理文件失败 {chunk_file.name}: {e}")
+            entities_created, relationships_created = self.process_chunk_file(chunk_file)
+            total_entities += entities_created
+            total_relationships += relationships_created
         
         print(f"\n📊 处理统计:")
         print(f"   - 处理的chunks: {self.stats['chunks_processed']}")
         print(f"   - 创建的实体: {total_entities}")
         print(f"   - 创建的关系: {total_relationships}")
 
+    def process_chunk_file(self, chunk_file: Path) -> tuple:
+        """处理单个chunks文件，返回 (创建的实体数, 创建的关系数)"""
+        print(f"📄 处理文件: {chunk_file.name}")
+        
+        total_entities = 0
+        total_relationships = 0
+        
+        try:
+            with open(chunk_file, 'r', encoding='utf-8') as f:
+                chunks_data = json.load(f)
+            
+            for chunk in chunks_data:
+                # 提取实体和关系
+                processed_chunk = self.extractor.process_chunk(chunk)
+                
+                # 创建PR_Chunk节点
+                self._create_chunk_node(processed_chunk)
+                
+                # 创建实体节点
+                entities_created = self._create_entity_nodes(processed_chunk['entities'])
+                total_entities += entities_created
+                
+                # 创建关系
+                relationships_created = self._create_relationships(
+                    processed_chunk['relationships'], 
+                    processed_chunk['entities']
+                )
+                total_relationships += relationships_created
+                
+                self.stats['chunks_processed'] += 1
+            
+            print(f"✅ {chunk_file.name}: {len(chunks_data)} chunks processed")
+            
+        except Exception as e:
+            print(f"❌ 处理文件失败 {chunk_file.name}: {e}")
+        
+        return total_entities, total_relationships
+
     def _create_chunk_node(self, processed_chunk: dict):
         """创建PR_Chunk节点"""
         create_chunk_query = """
@@ -5,10 +5,9 @@
 """
 
 import textwrap
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
-from langchain_community.graphs import Neo4jGraph
 from langchain_openai import OpenAIEmbeddings
 from pr_neo4j_env import *
 
@@ -16,12 +15,7 @@ class EnhancedPRGraphRAG:
     """增强的公关传播GraphRAG"""
     
     def __init__(self):
-        self.kg = Neo4jGraph(
-            url=NEO4J_URI, 
-            username=NEO4J_USERNAME, 
-            password=NEO4J_PASSWORD, 
-            database=NEO4J_DATABASE
-        )
+        self.kg = get_graph()
         self.llm = ChatOpenAI(
             model="gpt-3.5-turbo",
             temperature=0.1,
@@ -81,6 +75,45 @@ class EnhancedPRGraphRAG:
         except Exception as e:
             return f"❌ GraphRAG查询失败: {e}"
 
+    def query_stream(self, question: str) -> Iterator[str]:
+        """流式查询增强的图谱，回答生成时逐段产出文本"""
+        try:
+            cypher_query = self._generate_cypher_query(question)
+            results = self.kg.query(cypher_query)
+            
+            if not results:
+                yield "❌ 未找到相关信息"
+                return
+            
+            for chunk in self.llm.stream(self._build_answer_prompt(question, results)):
+                yield chunk.content
+                
+        except Exception as e:
+            yield f"❌ GraphRAG查询失败: {e}"
+
+    def query_batch(self, questions: List[str]) -> List[str]:
+        """批量查询增强的图谱，Cypher生成和回答生成各只并发调用一次LLM"""
+        try:
+            prompts = [self.cypher_query_template.format(question=q) for q in questions]
+            try:
+                cypher_queries = [r.content.strip() for r in self.llm.batch(prompts)]
+            except Exception as e:
+                print(f"⚠️ Cypher查询批量生成失败: {e}")
+                cypher_queries = [self._fallback_cypher_query(q) for q in questions]
+            
+            all_results = []
+            for cypher_query in cypher_queries:
+                try:
+                    all_results.append(self.kg.query(cypher_query))
+                except Exception as e:
+                    print(f"⚠️ Cypher查询执行失败: {e}")
+                    all_results.append([])
+            
+            return self._generate_answers(questions, all_results)
+            
+        except Exception as e:
+            return [f"❌ GraphRAG查询失败: {e}"] * len(questions)
+
     def _generate_cypher_query(self, question: str) -> str:
         """生成Cypher查询语句"""
         try:
@@ -108,11 +141,36 @@ class EnhancedPRGraphRAG:
         if not results:
             return "❌ 未找到相关信息"
         
+        try:
+            response = self.llm.invoke(self._build_answer_prompt(question, results))
+            return response.content
+        except Exception as e:
+            return f"❌ 回答生成失败: {e}"
+
+    def _generate_answers(self, questions: List[str], all_results: List[List[Dict]]) -> List[str]:
+        """批量生成回答，有结果的问题合并为一次并发LLM调用"""
+        answers = ["❌ 未找到相关信息"] * len(questions)
+        pending = [i for i, results in enumerate(all_results) if results]
+        if not pending:
+            return answers
+        
+        prompts = [self._build_answer_prompt(questions[i], all_results[i]) for i in pending]
+        try:
+            responses = self.llm.batch(prompts)
+            for i, response in zip(pending, responses):
+                answers[i] = response.content
+        except Exception as e:
+            for i in pending:
+                answers[i] = f"❌ 回答生成失败: {e}"
+        
+        return answers
+
+    def _build_answer_prompt(self, question: str, results: List[Dict]) -> str:
+        """构建回答生成的提示"""
         # 构建上下文
         context = self._build_context(results)
         
-        # 生成回答的提示
-        answer_prompt = f"""
+        return f"""
 基于以下公关传播知识图谱的查询结果，回答用户的问题。
 
 用户问题: {question}
@@ -128,12 +186,6 @@ class EnhancedPRGraphRAG:
 
 回答:
 """
-        
-        try:
-            response = self.llm.invoke(answer_prompt)
-            return response.content
-        except Exception as e:
-            return f"❌ 回答生成失败: {e}"
 
     def _build_context(self, results: List[Dict]) -> str:
         """构建上下文"""
@@ -164,12 +216,7 @@ class EnhancedPRVectorRAG:
     """增强的公关传播VectorRAG"""
     
     def __init__(self):
-        self.kg = Neo4jGraph(
-            url=NEO4J_URI, 
-            username=NEO4J_USERNAME, 
-            password=NEO4J_PASSWORD, 
-            database=NEO4J_DATABASE
-        )
+        self.kg = get_graph()
         self.llm = ChatOpenAI(
             model="gpt-3.5-turbo",
             temperature=0.1,
@@ -177,6 +224,19 @@ class EnhancedPRVectorRAG:
         )
         self.embeddings = OpenAIEmbeddings()
         
+        # 向量相似性查询
+        self.vector_query = f"""
+        CALL db.index.vector.queryNodes('{VECTOR_INDEX_NAME}', 5, $embedding)
+        YIELD node, score
+        RETURN node.text as text, 
+               node.source as source, 
+               node.content_type as content_type,
+               node.industry as industry,
+               node.brand_mentioned as brand_mentioned,
+               score
+        ORDER BY score DESC
+        """
+        
         # 增强的向量查询模板
         self.vector_query_template = PromptTemplate(
             input_variables=["question", "context"],
@@ -205,19 +265,7 @@ class EnhancedPRVectorRAG:
             question_embedding = self.embeddings.embed_query(question)
             
             # 向量相似性查询
-            vector_query = f"""
-            CALL db.index.vector.queryNodes('{VECTOR_INDEX_NAME}', 5, $embedding)
-            YIELD node, score
-            RETURN node.text as text, 
-                   node.source as source, 
-                   node.content_type as content_type,
-                   node.industry as industry,
-                   node.brand_mentioned as brand_mentioned,
-                   score
-            ORDER BY score DESC
-            """
-            
-            results = self.kg.query(vector_query, params={'embedding': question_embedding})
+            results = self.kg.query(self.vector_query, params={'embedding': question_embedding})
             
             if not results:
                 return "❌ 未找到相关信息"
@@ -234,6 +282,69 @@ class EnhancedPRVectorRAG:
         except Exception as e:
             return f"❌ VectorRAG查询失败: {e}"
 
+    def query_stream(self, question: str) -> Iterator[str]:
+        """流式查询增强的向量索引，回答生成时逐段产出文本"""
+        try:
+            question_embedding = self.embeddings.embed_query(question)
+            results = self.kg.query(self.vector_query, params={'embedding': question_embedding})
+            
+            if not results:
+                yield "❌ 未找到相关信息"
+                return
+            
+            context = self._build_vector_context(results)
+            answer_prompt = self.vector_query_template.format(question=question, context=context)
+            for chunk in self.llm.stream(answer_prompt):
+                yield chunk.content
+                
+        except Exception as e:
+            yield f"❌ VectorRAG查询失败: {e}"
+
+    def query_batch(self, questions: List[str]) -> List[str]:
+        """批量查询增强的向量索引：一次嵌入请求 + 一次Neo4j往返 + 一次并发LLM调用"""
+        try:
+            # 一次请求生成所有问题的嵌入
+            question_embeddings = self.embeddings.embed_documents(questions)
+            
+            # 用UNWIND在一次往返中完成所有问题的向量相似性查询
+            vector_query = f"""
+            UNWIND $payload AS p
+            CALL db.index.vector.queryNodes('{VECTOR_INDEX_NAME}', 5, p.embedding)
+            YIELD node, score
+            RETURN p.idx as idx,
+                   node.text as text, 
+                   node.source as source, 
+                   node.content_type as content_type,
+                   node.industry as industry,
+                   node.brand_mentioned as brand_mentioned,
+                   score
+            ORDER BY idx, score DESC
+            """
+            payload = [{'idx': i, 'embedding': e} for i, e in enumerate(question_embeddings)]
+            rows = self.kg.query(vector_query, params={'payload': payload})
+            
+            results_by_question = [[] for _ in questions]
+            for row in rows:
+                results_by_question[row['idx']].append(row)
+            
+            answers = ["❌ 未找到相关信息"] * len(questions)
+            pending = [i for i, results in enumerate(results_by_question) if results]
+            if pending:
+                prompts = [
+                    self.vector_query_template.format(
+                        question=questions[i],
+                        context=self._build_vector_context(results_by_question[i])
+                    )
+                    for i in pending
+                ]
+                for i, response in zip(pending, self.llm.batch(prompts)):
+                    answers[i] = response.content
+            
+            return answers
+            
+        except Exception as e:
+            return [f"❌ VectorRAG查询失败: {e}"] * len(questions)
+
     def _build_vector_context(self, results: List[Dict]) -> str:
         """构建向量查询上下文"""
         context_parts = []
@@ -267,6 +378,31 @@ class EnhancedPRRAGSystem:
         else:
             return self.vector_rag.query(question)
     
+    def query_stream(self, question: str, use_graph: bool = True) -> Iterator[str]:
+        """流式查询增强的RAG系统，逐段产出回答文本"""
+        print(f"🔍 查询问题: {question}")
+        print(f"📊 使用模式: {'GraphRAG' if use_graph else 'VectorRAG'}")
+        print("-" * 60)
+        
+        if use_graph:
+            return self.graph_rag.query_stream(question)
+        else:
+            return self.vector_rag.query_stream(question)
+    
+    def query_batch(self, questions: List[str], use_graph: bool = True) -> List[str]:
+        """批量查询增强的RAG系统，返回与问题顺序一致的回答列表"""
+        print(f"🔍 批量查询问题数: {len(questions)}")
+        print(f"📊 使用模式: {'GraphRAG' if use_graph else 'VectorRAG'}")
+        print("-" * 60)
+        
+        if not questions:
+            return []
+        
+        if use_graph:
+            return self.graph_rag.query_batch(questions)
+        else:
+            return self.vector_rag.query_batch(questions)
+    
     def get_entity_relationships(self, entity_name: str) -> Dict[str, Any]:
         """获取实体的关系信息"""
         try:
@@ -190,6 +190,23 @@ class EntityRelationshipExtractor:
             # 回退到规则提取
             return self._rule_based_relationship_extraction(text)
 
+    def extract_both(self, text: str) -> Tuple[Dict[str, List[Dict[str, Any]]], List[Dict[str, Any]]]:
+        """一次性提取实体和关系，返回 (entities, relationships)
+        
+        启用SPO提取器时，一次三元组提取同时得到实体和关系；
+        否则先提取实体，再以实体为输入提取关系（关系提取依赖实体结果，无法并行）。
+        """
+        if self.use_spo and self.spo_extractor:
+            try:
+                spo_result = self.extract_spo_triples_from_text(text, verbose=False)
+                triples = spo_result['normalized_triples']
+                return self._spo_to_entities(triples), self._spo_to_relationships(triples)
+            except Exception as e:
+                print(f"⚠️ SPO提取失败，回退到传统方法: {e}")
+        
+        entities = self.extract_entities_from_text(text)
+        return entities, self.extract_relationships_from_text(text, entities)
+
     def _parse_entity_response(self, response: str) -> Dict[str, List[Dict[str, Any]]]:
         """解析实体提取响应"""
         entities = {
@@ -0,0 +1,15 @@
+"""
+环境变量加载
+整个进程只解析一次 .env，避免每个模块导入时重复读取
+"""
+
+from dotenv import load_dotenv
+
+_ENV_LOADED = False
+
+def ensure_env():
+    """加载 .env 环境变量（重复调用不会再次读取文件）"""
+    global _ENV_LOADED
+    if not _ENV_LOADED:
+        load_dotenv('.env', override=True)
+        _ENV_LOADED = True
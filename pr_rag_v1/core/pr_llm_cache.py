@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+LLM响应缓存
+两级命中：精确键（SHA256）命中直接返回；开启语义匹配时，未命中再按企业信息的向量余弦相似度查找同一分区内的近似请求
+分区由调用方给出（如企业名称、生成参数、检索上下文的摘要），不同企业或知识库变化后不会共用缓存
+缓存持久化在sqlite中，重复或仅有细微改动的方案生成请求无需再次调用LLM
+"""
+
+import os
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# 可选导入本地向量模型（未安装时只使用精确匹配）
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+    SentenceTransformer = None
+
+# 可选导入numba（未安装时用NumPy矩阵乘法计算相似度）
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _cosine_scores(query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """按行并行计算点积，不产生临时数组；cache=True 将编译结果写入磁盘，避免每个进程重复JIT"""
+        n, d = matrix.shape
+        scores = np.empty(n, dtype=np.float32)
+        for i in prange(n):
+            acc = np.float32(0.0)
+            for j in range(d):
+                acc += matrix[i, j] * query[j]
+            scores[i] = acc
+        return scores
+else:
+    def _cosine_scores(query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        return matrix @ query
+
+def top1_cosine(query: np.ndarray, matrix: np.ndarray) -> Tuple[int, float]:
+    """返回与query余弦相似度最高的行号及相似度（query与matrix各行均已归一化，点积即余弦相似度）"""
+    scores = _cosine_scores(query, matrix)
+    best = int(np.argmax(scores))
+    return best, float(scores[best])
+
+class LLMResponseCache:
+    """基于sqlite的两级LLM响应缓存"""
+
+    def __init__(self, db_path: str = "data/llm_cache.sqlite", similarity_threshold: float = 0.95,
+                 semantic: bool = False,
+                 embed_model: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"):
+        """
+        初始化缓存
+
+        Args:
+            db_path: sqlite数据库路径
+            similarity_threshold: 语义命中所需的最低余弦相似度
+            semantic: 是否启用语义匹配（默认只做精确匹配）
+            embed_model: 计算企业信息向量的本地多语言模型
+        """
+        self.db_path = db_path
+        self.similarity_threshold = similarity_threshold
+        self.semantic = semantic
+        self.embed_model_name = embed_model
+        self._embed_model = None
+        self._lock = threading.Lock()
+
+        # (template_id, model, partition) -> (缓存键列表, 归一化向量矩阵)，首次语义查找时从数据库加载
+        self._vectors: Dict[Tuple[str, str, str], Tuple[List[str], np.ndarray]] = {}
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_response_cache (
+                key TEXT PRIMARY KEY,
+                template_id TEXT NOT NULL,
+                model TEXT NOT NULL,
+                partition TEXT NOT NULL,
+                embedding BLOB,
+                response TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_response_cache_group ON llm_response_cache (template_id, model, partition)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(template_id: str, model: str, vars_text: str, partition: str = "") -> str:
+        """精确缓存键：模板ID + 模型 + 分区 + 空白归一化后的企业信息"""
+        normalized = " ".join(vars_text.split())
+        return hashlib.sha256(f"{template_id}\x00{model}\x00{partition}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """计算归一化向量，未开启语义匹配或未安装sentence-transformers时返回None"""
+        if not self.semantic or not SENTENCE_TRANSFORMERS_AVAILABLE:
+            return None
+        if self._embed_model is None:
+            self._embed_model = SentenceTransformer(self.embed_model_name)
+        vector = self._embed_model.encode(text, normalize_embeddings=True)
+        return np.asarray(vector, dtype=np.float32)
+
+    def _load_vectors(self, template_id: str, model: str, partition: str) -> Tuple[List[str], np.ndarray]:
+        """加载指定模板、模型和分区下所有缓存条目的向量"""
+        group = (template_id, model, partition)
+        if group not in self._vectors:
+            rows = self.conn.execute(
+                "SELECT key, embedding FROM llm_response_cache "
+                "WHERE template_id = ? AND model = ? AND partition = ? AND embedding IS NOT NULL",
+                group
+            ).fetchall()
+            keys = [row[0] for row in rows]
+            if rows:
+                matrix = np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+            else:
+                matrix = np.empty((0, 0), dtype=np.float32)
+            self._vectors[group] = (keys, matrix)
+        return self._vectors[group]
+
+    def get(self, template_id: str, model: str, vars_text: str, partition: str = "") -> Optional[str]:
+        """查找缓存的响应，未命中返回None"""
+        with self._lock:
+            key = self.make_key(template_id, model, vars_text, partition)
+            row = self.conn.execute("SELECT response FROM llm_response_cache WHERE key = ?", (key,)).fetchone()
+            if row:
+                return row[0]
+
+            # 语义命中：同一模板和分区下企业信息足够相似的请求
+            query = self._embed(vars_text)
+            if query is None:
+                return None
+            keys, matrix = self._load_vectors(template_id, model, partition)
+            if not keys:
+                return None
+            best, score = top1_cosine(query, matrix)
+            if score < self.similarity_threshold:
+                return None
+
+            row = self.conn.execute("SELECT response FROM llm_response_cache WHERE key = ?", (keys[best],)).fetchone()
+            return row[0] if row else None
+
+    def put(self, template_id: str, model: str, vars_text: str, response: str, partition: str = ""):
+        """写入响应（调用方只应写入正常生成的文本，不写入错误或兜底输出）"""
+        with self._lock:
+            key = self.make_key(template_id, model, vars_text, partition)
+            vector = self._embed(vars_text)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_response_cache "
+                "(key, template_id, model, partition, embedding, response, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, template_id, model, partition, vector.tobytes() if vector is not None else None,
+                 response, datetime.now().isoformat())
+            )
+            self.conn.commit()
+
+            # 同步更新内存中的向量矩阵
+            group = (template_id, model, partition)
+            if vector is not None and group in self._vectors:
+                keys, matrix = self._vectors[group]
+                if key not in keys:
+                    keys.append(key)
+                    matrix = vector[None, :] if matrix.size == 0 else np.vstack([matrix, vector])
+                    self._vectors[group] = (keys, matrix)
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
@@ -214,6 +214,56 @@ def save_text_to_file(text, output_path):
         print(f"Error saving file {output_path}: {e}")
         return False
 
+# 支持的文件格式
+SUPPORTED_FORMATS = {
+    '.pdf': read_pdf_file,
+    '.xlsx': read_excel_file,
+    '.xls': read_excel_file,
+    '.csv': read_csv_file,
+    '.docx': read_docx_file,
+    '.doc': read_docx_file,
+    '.pptx': read_pptx_file,
+    '.ppt': read_pptx_file,
+    '.html': read_html_file,
+    '.htm': read_html_file,
+    '.json': read_json_file,
+    '.txt': read_txt_file
+}
+
+def preprocess_file(file_path, output_dir="data/cleaned"):
+    """预处理单个文档，成功时返回生成的文本文件路径，否则返回None"""
+    file_path = Path(file_path)
+    file_ext = file_path.suffix.lower()
+    
+    if file_ext not in SUPPORTED_FORMATS:
+        print(f"⚠️ Unsupported format: {file_path.name} ({file_ext})")
+        return None
+    
+    print(f"\nProcessing: {file_path.name} ({file_ext})")
+    
+    # 读取文件内容
+    content = SUPPORTED_FORMATS[file_ext](file_path)
+    if not content:
+        print(f"❌ Failed to read {file_path.name}")
+        return None
+    
+    # 提取文本
+    text_content = extract_text_from_content(content, file_ext[1:])
+    if not text_content:
+        print(f"❌ No text content extracted from {file_path.name}")
+        return None
+    
+    # 生成输出文件名
+    output_file_path = Path(output_dir) / (file_path.stem + ".txt")
+    
+    # 保存文本
+    if save_text_to_file(text_content, output_file_path):
+        print(f"✅ Successfully processed {file_path.name}")
+        return output_file_path
+    
+    print(f"❌ Failed to process {file_path.name}")
+    return None
+
 def process_multi_format_documents(input_dir="data/raw", output_dir="data/cleaned"):
     """处理多种格式的公关传播文档"""
     input_path = Path(input_dir)
@@ -226,59 +276,15 @@ def process_multi_format_documents(input_dir="data/raw", output_dir="data/cleane
     # 创建输出目录
     output_path.mkdir(parents=True, exist_ok=True)
     
-    # 支持的文件格式
-    supported_formats = {
-        '.pdf': read_pdf_file,
-        '.xlsx': read_excel_file,
-        '.xls': read_excel_file,
-        '.csv': read_csv_file,
-        '.docx': read_docx_file,
-        '.doc': read_docx_file,
-        '.pptx': read_pptx_file,
-        '.ppt': read_pptx_file,
-        '.html': read_html_file,
-        '.htm': read_html_file,
-        '.json': read_json_file,
-        '.txt': read_txt_file
-    }
-    
     # 统计处理的文件
     processed_files = 0
     
     for file_path in input_path.iterdir():
-        if file_path.is_file():
-            file_ext = file_path.suffix.lower()
-            
-            if file_ext in supported_formats:
-                print(f"\nProcessing: {file_path.name} ({file_ext})")
-                
-                # 读取文件内容
-                content = supported_formats[file_ext](file_path)
-                
-                if content:
-                    # 提取文本
-                    text_content = extract_text_from_content(content, file_ext[1:])
-                    
-                    if text_content:
-                        # 生成输出文件名
-                        output_filename = file_path.stem + ".txt"
-                        output_file_path = output_path / output_filename
-                        
-                        # 保存文本
-                        if save_text_to_file(text_content, output_file_path):
-                            print(f"✅ Successfully processed {file_path.name}")
-                            processed_files += 1
-                        else:
-                            print(f"❌ Failed to process {file_path.name}")
-                    else:
-                        print(f"❌ No text content extracted from {file_path.name}")
-                else:
-                    print(f"❌ Failed to read {file_path.name}")
-            else:
-                print(f"⚠️ Unsupported format: {file_path.name} ({file_ext})")
+        if file_path.is_file() and preprocess_file(file_path, output_dir):
+            processed_files += 1
     
     print(f"\n📊 处理完成！成功处理了 {processed_files} 个文件")
-    print(f"支持的文件格式: {', '.join(supported_formats.keys())}")
+    print(f"支持的文件格式: {', '.join(SUPPORTED_FORMATS.keys())}")
 
 if __name__ == "__main__":
     print("🚀 公关传播多格式文档预处理开始")
@@ -1,7 +1,8 @@
-from dotenv import load_dotenv
 import os
+import atexit
 from langchain_neo4j import Neo4jGraph
-load_dotenv('.env', override=True)
+from pr_env import ensure_env
+ensure_env()
 # Warning control
 import warnings
 warnings.filterwarnings("ignore")
@@ -56,17 +57,30 @@ PR_PROPERTIES = {
     'KPI': ['metric_name', 'target_value', 'actual_value', 'measurement_date']
 }
 
+# Neo4j连接池配置（通过Neo4jGraph公开的driver_config参数设置，整个进程共享这一个连接池）
+NEO4J_DRIVER_CONFIG = {
+    'max_connection_pool_size': 50,
+    'connection_acquisition_timeout': 60,
+    'keep_alive': True
+}
+
 # Neo4j连接配置
 try:
     graph = Neo4jGraph(
         url=NEO4J_URI, 
         username=NEO4J_USERNAME, 
         password=NEO4J_PASSWORD, 
-        database=NEO4J_DATABASE
+        database=NEO4J_DATABASE,
+        driver_config=NEO4J_DRIVER_CONFIG
     )
+    atexit.register(graph.close)
     print("✅ Neo4j连接成功")
 except Exception as e:
     print(f"❌ Neo4j连接失败: {e}")
     graph = None
 
-
+def get_graph():
+    """获取共享的Neo4jGraph连接，连接不可用时抛出异常"""
+    if graph is None:
+        raise RuntimeError("Neo4j连接不可用，请检查 .env 配置和数据库状态")
+    return graph
@@ -0,0 +1,29 @@
+"""
+性能埋点
+设置环境变量 PR_PROFILE=1 时用 Logfire 为热点函数记录调用span（调用次数、耗时、嵌套关系），
+便于发现逐条查询Neo4j之类的回退；未设置时装饰器原样返回函数，没有任何额外开销
+"""
+
+import os
+
+def _noop_instrument(span_name: str):
+    """未开启埋点时的装饰器：原样返回函数"""
+    def decorator(func):
+        return func
+    return decorator
+
+instrument = _noop_instrument
+
+if os.getenv("PR_PROFILE"):
+    try:
+        import logfire
+        logfire.configure()
+
+        def instrument(span_name: str):
+            """为函数调用记录名为 span_name 的span"""
+            return logfire.instrument(span_name)
+    except ImportError:
+        print("⚠️ 已设置PR_PROFILE但未安装logfire，性能埋点未启用（pip install logfire）")
+    except Exception as e:
+        # 如缺少Logfire凭据导致 configure() 失败：不影响业务代码导入，退回空操作装饰器
+        print(f"⚠️ Logfire初始化失败，性能埋点未启用: {e}")
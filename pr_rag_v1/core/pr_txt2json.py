@@ -78,6 +78,34 @@ def save_json_to_file(data, output_path):
         print(f"Error saving JSON file {output_path}: {e}")
         return False
 
+def convert_text_file(txt_file, output_dir="data/json"):
+    """将单个文本文件转换为JSON，成功时返回生成的JSON文件路径，否则返回None"""
+    txt_file = Path(txt_file)
+    print(f"\nProcessing: {txt_file.name}")
+    
+    # 读取文本内容
+    text_content = read_text_file(txt_file)
+    if not text_content:
+        return None
+    
+    # 解析为JSON
+    json_data = parse_pr_text_to_json(text_content)
+    if not json_data:
+        print(f"No JSON data generated from {txt_file.name}")
+        return None
+    
+    # 生成输出文件名
+    output_file_path = Path(output_dir) / (txt_file.stem + ".json")
+    
+    # 保存JSON
+    if save_json_to_file(json_data, output_file_path):
+        print(f"✅ Successfully processed {txt_file.name}")
+        print(f"   Generated {len(json_data)} sections")
+        return output_file_path
+    
+    print(f"❌ Failed to process {txt_file.name}")
+    return None
+
 def process_pr_text_files(input_dir="data/cleaned", output_dir="data/json"):
     """处理公关传播文本文件"""
     input_path = Path(input_dir)
@@ -100,29 +128,7 @@ def process_pr_text_files(input_dir="data/cleaned", output_dir="data/json"):
     print(f"Found {len(txt_files)} text files to process")
     
     for txt_file in txt_files:
-        print(f"\nProcessing: {txt_file.name}")
-        
-        # 读取文本内容
-        text_content = read_text_file(txt_file)
-        if not text_content:
-            continue
-        
-        # 解析为JSON
-        json_data = parse_pr_text_to_json(text_content)
-        if not json_data:
-            print(f"No JSON data generated from {txt_file.name}")
-            continue
-        
-        # 生成输出文件名
-        output_filename = txt_file.stem + ".json"
-        output_file_path = output_path / output_filename
-        
-        # 保存JSON
-        if save_json_to_file(json_data, output_file_path):
-            print(f"✅ Successfully processed {txt_file.name}")
-            print(f"   Generated {len(json_data)} sections")
-        else:
-            print(f"❌ Failed to process {txt_file.name}")
+        convert_text_file(txt_file, output_dir)
 
 if __name__ == "__main__":
     print("🚀 公关传播文本转JSON开始")
@@ -5,10 +5,11 @@
 
 import os
 import sys
-from dotenv import load_dotenv
 
 # 加载环境变量
-load_dotenv('.env', override=True)
+sys.path.append('core')
+from pr_env import ensure_env
+ensure_env()
 
 def test_unified_system():
     """测试统一系统"""
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+预生成演示问题的向量
+演示问题固定不变，向量只需生成一次，演示时直接加载即可跳过嵌入API调用
+"""
+
+import numpy as np
+from ask_pr import embeddings
+from demo_direct_query_simple import DEMO_QUESTIONS, DEMO_EMBEDDINGS_PATH
+
+def main():
+    """主函数"""
+    print(f"🔄 生成 {len(DEMO_QUESTIONS)} 个演示问题的向量...")
+    
+    vectors = np.asarray(embeddings.embed_documents(list(DEMO_QUESTIONS)), dtype=np.float32)
+    np.save(DEMO_EMBEDDINGS_PATH, vectors)
+    
+    print(f"✅ 已保存: {DEMO_EMBEDDINGS_PATH} {vectors.shape}")
+
+if __name__ == "__main__":
+    main()
@@ -21,8 +21,7 @@ def demo_questions():
     ]
     
     print("📋 演示问题列表:")
-    for i, q in enumerate(demo_questions, 1):
-        print(f"{i}. {q}")
+    print(*(f"{i}. {q}" for i, q in enumerate(demo_questions, 1)), sep="\n")
     
     print(f"\n🎯 选择要演示的问题 (1-{len(demo_questions)}) 或输入 'all' 演示所有问题:")
     
@@ -55,32 +54,31 @@ def demo_questions():
 
 def demo_usage():
     """演示使用方法"""
-    print(f"\n📚 使用方法演示:")
-    print("=" * 60)
-    
-    print("1. 命令行快速查询:")
-    print("   python3 ask_pr.py '你的问题'")
-    print("   示例: python3 ask_pr.py '美妆品牌如何建立消费者联系'")
-    
-    print(f"\n2. 交互式查询:")
-    print("   python3 neo4j_direct_query.py")
-    
-    print(f"\n3. 在代码中使用:")
-    print("   from ask_pr import ask_question")
-    print("   answer = ask_question('你的问题')")
-    
-    print(f"\n4. 批量查询:")
-    print("   questions = ['问题1', '问题2', '问题3']")
-    print("   for q in questions:")
-    print("       answer = ask_question(q)")
+    lines = [
+        "\n📚 使用方法演示:",
+        "=" * 60,
+        "1. 命令行快速查询:",
+        "   python3 ask_pr.py '你的问题'",
+        "   示例: python3 ask_pr.py '美妆品牌如何建立消费者联系'",
+        "\n2. 交互式查询:",
+        "   python3 neo4j_direct_query.py",
+        "\n3. 在代码中使用:",
+        "   from ask_pr import ask_question",
+        "   answer = ask_question('你的问题')",
+        "\n4. 批量查询:",
+        "   questions = ['问题1', '问题2', '问题3']",
+        "   for q in questions:",
+        "       answer = ask_question(q)",
+    ]
+    print("\n".join(lines))
 
 def demo_neo4j_setup():
     """演示Neo4j数据设置"""
-    print(f"\n🔧 Neo4j数据设置演示:")
-    print("=" * 60)
-    
-    print("在Neo4j中直接创建PR_Chunk节点:")
-    print("""
+    lines = [
+        "\n🔧 Neo4j数据设置演示:",
+        "=" * 60,
+        "在Neo4j中直接创建PR_Chunk节点:",
+        """
     CREATE (c:PR_Chunk {
       chunkId: "brand_case_001",
       text: "雅诗兰黛通过沉浸式体验活动建立与消费者的联系",
@@ -91,36 +89,38 @@ def demo_neo4j_setup():
       industry: "beauty",
       brand_mentioned: ["雅诗兰黛"]
     })
-    """)
-    
-    print("创建向量索引:")
-    print("""
+    """,
+        "创建向量索引:",
+        """
     CREATE VECTOR INDEX PR_OpenAI IF NOT EXISTS
     FOR (c:PR_Chunk) ON (c.textEmbeddingOpenAI)
     OPTIONS {indexConfig: {
       `vector.dimensions`: 1536,
       `vector.similarity_function`: 'cosine'
     }}
-    """)
-    
-    print("添加向量嵌入:")
-    print("""
+    """,
+        "添加向量嵌入:",
+        """
     MATCH (c:PR_Chunk)
     WHERE c.textEmbeddingOpenAI IS NULL
     CALL apoc.ml.openai.embedding([c.text], 'your-api-key') YIELD embeddings
     SET c.textEmbeddingOpenAI = embeddings[0]
-    """)
+    """,
+    ]
+    print("\n".join(lines))
 
 def main():
     """主函数"""
     print("🎬 Neo4j直接查询系统演示")
     print("=" * 60)
     
-    print("选择演示内容:")
-    print("1. 问题查询演示")
-    print("2. 使用方法演示") 
-    print("3. Neo4j数据设置演示")
-    print("4. 全部演示")
+    print("\n".join([
+        "选择演示内容:",
+        "1. 问题查询演示",
+        "2. 使用方法演示",
+        "3. Neo4j数据设置演示",
+        "4. 全部演示",
+    ]))
     
     choice = input("选择 (1-4): ").strip()
     
@@ -3,28 +3,44 @@
 Neo4j直接查询系统演示（非交互式）
 """
 
+from pathlib import Path
+import numpy as np
 from ask_pr import ask_question
 
+# 演示问题（固定不变，其向量可预先生成: python3 bake_demo_embeddings.py）
+DEMO_QUESTIONS = (
+    "美妆类品牌应该如何建立和消费者的联系",
+    "华与华有哪些成功的品牌案例", 
+    "内容营销的核心策略是什么",
+)
+DEMO_EMBEDDINGS_PATH = Path(__file__).with_name('demo_embeddings.npy')
+
+def load_demo_embeddings():
+    """加载预生成的演示问题向量，文件缺失或与问题列表不匹配时返回None"""
+    if not DEMO_EMBEDDINGS_PATH.exists():
+        return None
+    embeddings = np.load(DEMO_EMBEDDINGS_PATH, mmap_mode='r')
+    if embeddings.shape[0] != len(DEMO_QUESTIONS):
+        print("⚠️ 预生成向量与演示问题数量不一致，将实时生成向量")
+        return None
+    return embeddings
+
+DEMO_EMBEDDINGS = load_demo_embeddings()
+
 def demo_questions():
     """演示问题查询"""
     print("🚀 Neo4j直接查询系统演示")
     print("=" * 60)
     
-    # 演示问题
-    demo_questions = [
-        "美妆类品牌应该如何建立和消费者的联系",
-        "华与华有哪些成功的品牌案例", 
-        "内容营销的核心策略是什么"
-    ]
-    
     print("📋 演示问题查询:")
-    for i, question in enumerate(demo_questions, 1):
+    for i, question in enumerate(DEMO_QUESTIONS, 1):
         print(f"\n{'='*80}")
         print(f"问题 {i}: {question}")
         print('='*80)
         
         try:
-            answer = ask_question(question)
+            embedding = DEMO_EMBEDDINGS[i - 1] if DEMO_EMBEDDINGS is not None else None
+            answer = ask_question(question, embedding=embedding)
             print(f"\n🤖 回答:")
             print("-" * 40)
             print(answer)
@@ -33,48 +49,49 @@ def demo_questions():
 
 def demo_usage():
     """演示使用方法"""
-    print(f"\n📚 使用方法:")
-    print("=" * 60)
-    
-    print("1. 命令行快速查询:")
-    print("   python3 ask_pr.py '你的问题'")
-    print("   示例: python3 ask_pr.py '美妆品牌如何建立消费者联系'")
-    
-    print(f"\n2. 交互式查询:")
-    print("   python3 neo4j_direct_query.py")
-    
-    print(f"\n3. 在代码中使用:")
-    print("   from ask_pr import ask_question")
-    print("   answer = ask_question('你的问题')")
+    lines = [
+        "\n📚 使用方法:",
+        "=" * 60,
+        "1. 命令行快速查询:",
+        "   python3 ask_pr.py '你的问题'",
+        "   示例: python3 ask_pr.py '美妆品牌如何建立消费者联系'",
+        "\n2. 交互式查询:",
+        "   python3 neo4j_direct_query.py",
+        "\n3. 在代码中使用:",
+        "   from ask_pr import ask_question",
+        "   answer = ask_question('你的问题')",
+    ]
+    print("\n".join(lines))
 
 def demo_neo4j_setup():
     """演示Neo4j数据设置"""
-    print(f"\n🔧 Neo4j数据设置:")
-    print("=" * 60)
-    
-    print("在Neo4j中直接创建PR_Chunk节点:")
-    print("""
-    CREATE (c:PR_Chunk {
-      chunkId: "brand_case_001",
-      text: "雅诗兰黛通过沉浸式体验活动建立与消费者的联系",
-      source: "雅诗兰黛案例",
-      formItem: "品牌策略",
-      chunkSeqId: 0,
-      content_type: "brand_strategy",
-      industry: "beauty",
-      brand_mentioned: ["雅诗兰黛"]
-    })
-    """)
-    
-    print("创建向量索引:")
-    print("""
-    CREATE VECTOR INDEX PR_OpenAI IF NOT EXISTS
-    FOR (c:PR_Chunk) ON (c.textEmbeddingOpenAI)
-    OPTIONS {indexConfig: {
-      `vector.dimensions`: 1536,
-      `vector.similarity_function`: 'cosine'
-    }}
-    """)
+    lines = [
+        "\n🔧 Neo4j数据设置:",
+        "=" * 60,
+        "在Neo4j中直接创建PR_Chunk节点:",
+        """
+        CREATE (c:PR_Chunk {
+          chunkId: "brand_case_001",
+          text: "雅诗兰黛通过沉浸式体验活动建立与消费者的联系",
+          source: "雅诗兰黛案例",
+          formItem: "品牌策略",
+          chunkSeqId: 0,
+          content_type: "brand_strategy",
+          industry: "beauty",
+          brand_mentioned: ["雅诗兰黛"]
+        })
+        """,
+        "创建向量索引:",
+        """
+        CREATE VECTOR INDEX PR_OpenAI IF NOT EXISTS
+        FOR (c:PR_Chunk) ON (c.textEmbeddingOpenAI)
+        OPTIONS {indexConfig: {
+          `vector.dimensions`: 1536,
+          `vector.similarity_function`: 'cosine'
+        }}
+        """,
+    ]
+    print("\n".join(lines))
 
 def main():
     """主函数"""
@@ -8,70 +8,141 @@ import os
 import sys
 import json
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-from dotenv import load_dotenv
 import warnings
 warnings.filterwarnings("ignore")
 
-# 加载环境变量
-load_dotenv('.env', override=True)
-
 # 添加核心模块路径
 sys.path.append('core')
 sys.path.append('tools')
 
-def main():
-    """主处理流程"""
-    print("🔄 启动公关传播RAG系统完整处理流程...")
-    print("=" * 60)
+# 加载环境变量
+from pr_env import ensure_env
+ensure_env()
+
+def process_file(file_path):
+    """单个原始文件的 预处理→JSON→分块，返回生成的chunks文件路径（失败时返回None）
     
-    # 检查数据目录
-    data_dirs = ['data/raw', 'data/cleaned', 'data/json', 'data/chunks']
-    for dir_path in data_dirs:
-        Path(dir_path).mkdir(parents=True, exist_ok=True)
-        print(f"✅ 确保目录存在: {dir_path}")
+    各文件之间互不依赖，可在进程池中并行执行。
+    """
+    from pr_multi_format_preprocessing import preprocess_file
     
-    # 步骤1: 预处理 - 多格式文档提取
-    print("\n📄 步骤1: 多格式文档预处理...")
     try:
-        from pr_multi_format_preprocessing import process_multi_format_documents
-        process_multi_format_documents()
-        print("✅ 预处理完成")
+        txt_path = preprocess_file(file_path)
+        if txt_path is None:
+            return None
+        
+        return process_text_file(txt_path)
     except Exception as e:
-        print(f"❌ 预处理失败: {e}")
-        return False
+        print(f"❌ 文件处理失败 {file_path}: {e}")
+        return None
+
+def process_text_file(txt_path):
+    """对 data/cleaned 中的单个文本文件做 JSON转换→分块，返回生成的chunks文件路径（失败时返回None）"""
+    from pr_txt2json import convert_text_file
     
-    # 步骤2: JSON转换
-    print("\n🔄 步骤2: JSON格式转换...")
     try:
-        from pr_txt2json import process_pr_text_files
-        process_pr_text_files()
-        print("✅ JSON转换完成")
+        json_path = convert_text_file(txt_path)
+        if json_path is None:
+            return None
+        
+        return chunk_json_file(json_path)
     except Exception as e:
-        print(f"❌ JSON转换失败: {e}")
-        return False
+        print(f"❌ 文本文件处理失败 {txt_path}: {e}")
+        return None
+
+def process_file_group(file_paths):
+    """依次处理同名（stem相同）的原始文件，返回 [(原始文件, chunks文件或None)]
+    
+    同名文件（如 foo.pdf 与 foo.docx）写入相同的 cleaned/json/chunks 路径，放在同一个进程中串行处理，避免并行写同一文件。
+    """
+    return [(file_path, process_file(file_path)) for file_path in file_paths]
+
+def chunk_json_file(json_path):
+    """对 data/json 中的单个JSON文件分块，返回生成的chunks文件路径（失败时返回None）"""
+    from pr_chunking import split_pr_data_from_file
     
-    # 步骤3: 文本分块
-    print("\n✂️ 步骤3: 文本分块处理...")
     try:
-        from pr_chunking import process_all_pr_files
-        process_all_pr_files()
-        print("✅ 文本分块完成")
+        json_path = Path(json_path)
+        if not split_pr_data_from_file(str(json_path)):
+            return None
+        
+        return str(Path("data/chunks") / f"{json_path.stem}_chunks.json")
     except Exception as e:
-        print(f"❌ 文本分块失败: {e}")
-        return False
+        print(f"❌ 文件分块失败 {json_path}: {e}")
+        return None
+
+def main():
+    """主处理流程"""
+    print("🔄 启动公关传播RAG系统完整处理流程...")
+    print("=" * 60)
+    
+    # 检查数据目录
+    data_dirs = ['data/raw', 'data/cleaned', 'data/json', 'data/chunks']
+    for dir_path in data_dirs:
+        Path(dir_path).mkdir(parents=True, exist_ok=True)
+        print(f"✅ 确保目录存在: {dir_path}")
     
-    # 步骤4: Neo4j集成
-    print("\n🔗 步骤4: Neo4j知识图谱集成...")
+    # 原始文件按stem分组；data/cleaned 中没有对应原始文件的文本（如手动放入的）需要转换JSON再分块；
+    # data/json 中既没有原始文件也没有文本的JSON（如之前单独转换的）只需分块
+    raw_groups = {}
+    for f in Path('data/raw').iterdir():
+        if f.is_file():
+            raw_groups.setdefault(f.stem, []).append(str(f))
+    txt_files = [str(f) for f in Path('data/cleaned').glob('*.txt') if f.stem not in raw_groups]
+    converted_stems = set(raw_groups) | {Path(f).stem for f in txt_files}
+    json_files = [str(f) for f in Path('data/json').glob('*.json') if f.stem not in converted_stems]
+    if not raw_groups and not txt_files and not json_files:
+        print("⚠️ data/raw、data/cleaned 和 data/json 中没有待处理的文件")
+        return True
+    raw_count = sum(len(group) for group in raw_groups.values())
+    
+    # Neo4j集成在主进程中进行，先建立连接
     try:
         from pr_enhanced_neo4j_integration import EnhancedPRNeo4jIntegration
         integration = EnhancedPRNeo4jIntegration()
-        integration.process_chunks_with_entities()
-        print("✅ Neo4j集成完成")
     except Exception as e:
-        print(f"❌ Neo4j集成失败: {e}")
+        print(f"❌ Neo4j集成初始化失败: {e}")
         return False
     
+    # 步骤1-3: 预处理→JSON转换→文本分块，按文件组在进程池中并行执行；已有的文本从JSON转换开始，已有的JSON只做分块
+    # 步骤4: 任一文件分块完成后立即在主进程中进行Neo4j集成，与其余文件的处理流水线重叠
+    print(f"\n📄 步骤1-4: 并行处理 {raw_count} 个原始文件、{len(txt_files)} 个文本文件和 {len(json_files)} 个JSON文件 (预处理→JSON→分块→Neo4j集成)...")
+    total_entities = 0
+    total_relationships = 0
+    failed_files = []
+    
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        # future -> 单独处理的文本或JSON文件（原始文件组为None）
+        futures = {pool.submit(process_file_group, group): None for group in raw_groups.values()}
+        futures.update({pool.submit(process_text_file, f): f for f in txt_files})
+        futures.update({pool.submit(chunk_json_file, f): f for f in json_files})
+        for future in as_completed(futures):
+            source_file = futures[future]
+            results = future.result() if source_file is None else [(source_file, future.result())]
+            
+            # 同组文件写入同一个chunks文件，只集成一次
+            chunk_files = set()
+            for source, chunk_file in results:
+                if chunk_file is None:
+                    failed_files.append(source)
+                else:
+                    chunk_files.add(chunk_file)
+            
+            for chunk_file in chunk_files:
+                entities_created, relationships_created = integration.process_chunk_file(Path(chunk_file))
+                total_entities += entities_created
+                total_relationships += relationships_created
+    
+    print(f"\n📊 Neo4j集成统计:")
+    print(f"   - 处理的chunks: {integration.stats['chunks_processed']}")
+    print(f"   - 创建的实体: {total_entities}")
+    print(f"   - 创建的关系: {total_relationships}")
+    if failed_files:
+        print(f"⚠️ 未能处理的文件: {', '.join(Path(f).name for f in failed_files)}")
+    print("✅ 预处理、JSON转换、文本分块和Neo4j集成完成")
+    
     # 步骤5: 实体关系提取
     print("\n🎯 步骤5: 实体关系提取...")
     try:
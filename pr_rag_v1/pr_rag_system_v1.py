@@ -7,18 +7,154 @@
 import os
 import sys
 from pathlib import Path
-from dotenv import load_dotenv
 
-# 加载环境变量
-load_dotenv('.env', override=True)
+# core模块之间以 `from pr_neo4j_env import ...` 互相引用，保证整个进程共享同一个Neo4j连接
+sys.path.append(str(Path(__file__).parent / "core"))
+
+# 加载环境变量（整个进程只加载一次）
+from pr_env import ensure_env
+ensure_env()
+
+# 横幅、使用指南和架构图均为固定文本，模块加载时构建一次
+_BANNER_TMPL = """
+╔══════════════════════════════════════════════════════════════════════════════╗
+║                          {system_name} v{version}                          ║
+║                                                                              ║
+║  {description}        ║
+║                                                                              ║
+║  🎯 核心功能:                                                               ║
+║     • 智能实体识别 (品牌、企业、媒体、活动等)                                ║
+║     • 关系提取 (合作、竞争、媒体投放等)                                      ║
+║     • 增强RAG查询 (GraphRAG + VectorRAG)                                    ║
+║     • 多格式文档处理 (PDF、Word、Excel、PPT等)                              ║
+║     • 增量处理 (只处理新文件)                                                ║
+║     • Chunk编辑 (人工优化数据)                                               ║
+║                                                                              ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+        """
+
+USAGE_GUIDE = """
+📚 公关传播RAG系统 v1.0 使用指南
+
+🎯 系统概述:
+   本系统是一个基于Neo4j的增强版公关传播知识图谱RAG系统，专门用于分析
+   公关公司案例、品牌传播方案等内容。
+
+🏗️ 核心功能:
+   1. 智能实体识别 - 识别品牌、企业、媒体、活动等实体
+   2. 关系提取 - 识别合作、竞争、媒体投放等关系
+   3. 增强RAG查询 - GraphRAG + VectorRAG双重查询能力
+   4. 多格式处理 - 支持PDF、Word、Excel、PPT等格式
+   5. 增量处理 - 只处理新文件，节省资源
+   6. Chunk编辑 - 人工优化数据质量
+
+📁 数据流程:
+   data/raw/ → 预处理 → data/cleaned/ → JSON转换 → data/json/ 
+   → 分块处理 → data/chunks/ → Neo4j集成 → 知识图谱
+
+🔍 查询模式:
+   • GraphRAG: 基于实体和关系的结构化查询
+   • VectorRAG: 基于语义相似性的向量查询
+   • 直接查询: 绕过预处理直接查询Neo4j
+
+📊 实体类型:
+   Brand(品牌), Company(企业), Agency(公关公司), Campaign(活动),
+   Strategy(策略), Media(媒体), Platform(平台), Influencer(意见领袖),
+   Content(内容), KPI(指标)
+
+🔗 关系类型:
+   COLLABORATES_WITH(合作), BRAND_COLLABORATION(品牌联名),
+   MEDIA_PLACEMENT(媒体投放), COMPETES_WITH(竞争),
+   LAUNCHES_CAMPAIGN(发起活动), USES_STRATEGY(使用策略)等
+
+💡 使用建议:
+   1. 首次使用选择"完整处理"模式
+   2. 后续更新数据使用"增量处理"模式
+   3. 查询时优先使用"增强RAG查询"
+   4. 定期使用"Chunk编辑"优化数据质量
+
+📞 技术支持:
+   如遇问题，请检查:
+   - .env文件配置是否正确
+   - Neo4j数据库是否正常运行
+   - 数据文件格式是否正确
+        """
+
+SYSTEM_ARCHITECTURE = """
+🏗️ 公关传播RAG系统 v1.0 架构图
+
+┌─────────────────────────────────────────────────────────────────┐
+│                        数据输入层                                │
+├─────────────────────────────────────────────────────────────────┤
+│  PDF, Word, Excel, PPT, HTML, JSON, TXT 等格式文档              │
+└─────────────────────────────────────────────────────────────────┘
+                                ↓
+┌─────────────────────────────────────────────────────────────────┐
+│                        预处理层                                  │
+├─────────────────────────────────────────────────────────────────┤
+│  pr_multi_format_preprocessing.py  →  pr_txt2json.py           │
+│  (多格式文本提取)                    →  (JSON转换)               │
+└─────────────────────────────────────────────────────────────────┘
+                                ↓
+┌─────────────────────────────────────────────────────────────────┐
+│                        分块处理层                                │
+├─────────────────────────────────────────────────────────────────┤
+│  pr_chunking.py  →  chunk_editor.py                             │
+│  (文本分块)        →  (人工编辑)                                  │
+└─────────────────────────────────────────────────────────────────┘
+                                ↓
+┌─────────────────────────────────────────────────────────────────┐
+│                        实体识别层                                │
+├─────────────────────────────────────────────────────────────────┤
+│  pr_entity_extractor.py  →  pr_enhanced_schema.py              │
+│  (实体关系提取)            →  (图谱模式定义)                      │
+└─────────────────────────────────────────────────────────────────┘
+                                ↓
+┌─────────────────────────────────────────────────────────────────┐
+│                        知识图谱层                                │
+├─────────────────────────────────────────────────────────────────┤
+│  pr_enhanced_neo4j_integration.py  →  Neo4j Database            │
+│  (Neo4j集成)                      →  (图数据库)                  │
+└─────────────────────────────────────────────────────────────────┘
+                                ↓
+┌─────────────────────────────────────────────────────────────────┐
+│                        RAG查询层                                 │
+├─────────────────────────────────────────────────────────────────┤
+│  pr_enhanced_rag.py  →  GraphRAG + VectorRAG                    │
+│  (增强RAG系统)        →  (双重查询能力)                           │
+└─────────────────────────────────────────────────────────────────┘
+                                ↓
+┌─────────────────────────────────────────────────────────────────┐
+│                        应用接口层                                │
+├─────────────────────────────────────────────────────────────────┤
+│  ask_pr.py, neo4j_direct_query.py, quick_query.py              │
+│  (多种查询接口)                                                   │
+└─────────────────────────────────────────────────────────────────┘
+
+🔧 核心组件说明:
+   • 数据预处理: 支持多种格式文档的文本提取
+   • 实体识别: 基于LLM+规则的智能实体提取
+   • 关系提取: 识别公关传播特有的关系类型
+   • 知识图谱: Neo4j存储实体和关系
+   • RAG查询: GraphRAG和VectorRAG双重能力
+   • 增量处理: 只处理新文件，提高效率
+   • Chunk编辑: 人工优化数据质量
+        """
 
 class PRRAGSystemV1:
     """公关传播RAG系统 v1.0 主类"""
     
+    VERSION = "1.0"
+    SYSTEM_NAME = "公关传播RAG系统"
+    DESCRIPTION = "基于Neo4j的增强版公关传播知识图谱RAG系统"
+    _BANNER = _BANNER_TMPL.format(system_name=SYSTEM_NAME, version=VERSION, description=DESCRIPTION)
+    
     def __init__(self):
-        self.version = "1.0"
-        self.system_name = "公关传播RAG系统"
-        self.description = "基于Neo4j的增强版公关传播知识图谱RAG系统"
+        self.version = self.VERSION
+        self.system_name = self.SYSTEM_NAME
+        self.description = self.DESCRIPTION
+        self._apoc_available = None
+        self._rag_system = None
         
         # 核心模块路径
         self.core_modules = {
@@ -45,26 +181,28 @@ class PRRAGSystemV1:
             'test_enhanced': 'demos/test_enhanced_pr_rag.py',
             'quick_query': 'tools/quick_query.py'
         }
+        
+        # 菜单选项分发表
+        self._menu = {
+            '1': self.run_full_processing,
+            '2': self.run_incremental_processing,
+            '3': self.run_chunk_editing,
+            '4': self.run_upload_chunks_to_neo4j,
+            '5': self.run_enhanced_rag,
+            '6': self.run_direct_query,
+            '7': self.run_quick_query,
+            '8': self.run_demo,
+            '9': self.run_tests,
+            '10': self.check_system_status,
+            '11': self.show_usage_guide,
+            '12': self.show_system_architecture,
+            '13': self._quit
+        }
+        self._should_exit = False
 
     def show_banner(self):
         """显示系统横幅"""
-        banner = f"""
-╔══════════════════════════════════════════════════════════════════════════════╗
-║                          {self.system_name} v{self.version}                          ║
-║                                                                              ║
-║  {self.description}        ║
-║                                                                              ║
-║  🎯 核心功能:                                                               ║
-║     • 智能实体识别 (品牌、企业、媒体、活动等)                                ║
-║     • 关系提取 (合作、竞争、媒体投放等)                                      ║
-║     • 增强RAG查询 (GraphRAG + VectorRAG)                                    ║
-║     • 多格式文档处理 (PDF、Word、Excel、PPT等)                              ║
-║     • 增量处理 (只处理新文件)                                                ║
-║     • Chunk编辑 (人工优化数据)                                               ║
-║                                                                              ║
-╚══════════════════════════════════════════════════════════════════════════════╝
-        """
-        print(banner)
+        print(self._BANNER)
 
     def check_environment(self):
         """检查环境配置"""
@@ -176,8 +314,17 @@ class PRRAGSystemV1:
         """运行增强RAG查询"""
         print("🔍 启动增强RAG查询模式...")
         try:
-            from core.pr_enhanced_rag import EnhancedPRRAGSystem
-            rag_system = EnhancedPRRAGSystem()
+            # 启用行编辑和问题历史（上下方向键可调出之前的问题）
+            try:
+                import readline  # noqa: F401
+            except ImportError:
+                pass
+            
+            # 复用RAG系统实例，保持LLM/嵌入HTTP连接和Neo4j连接池在多次进入查询模式间可用
+            if self._rag_system is None:
+                from core.pr_enhanced_rag import EnhancedPRRAGSystem
+                self._rag_system = EnhancedPRRAGSystem()
+            rag_system = self._rag_system
             
             print("增强RAG系统已启动，请输入问题 (输入 'quit' 退出):")
             while True:
@@ -187,8 +334,11 @@ class PRRAGSystemV1:
                 
                 if question:
                     use_graph = input("使用GraphRAG? (y/n): ").strip().lower() == 'y'
-                    answer = rag_system.query(question, use_graph=use_graph)
-                    print(f"\n🤖 回答:\n{answer}")
+                    stream = rag_system.query_stream(question, use_graph=use_graph)
+                    print("\n🤖 回答:")
+                    for chunk in stream:
+                        print(chunk, end='', flush=True)
+                    print()
         except Exception as e:
             print(f"❌ 增强RAG查询失败: {e}")
 
@@ -233,10 +383,10 @@ class PRRAGSystemV1:
         """检查系统状态"""
         print("📊 检查系统状态...")
         
-        # 检查Neo4j连接
+        # 检查Neo4j连接，同时取回节点统计（一次往返）
         try:
-            from core.pr_neo4j_env import graph
-            result = graph.query("RETURN 1 as test")
+            from pr_neo4j_env import get_graph
+            counts = self._query_node_counts(get_graph())
             print("✅ Neo4j连接正常")
         except Exception as e:
             print(f"❌ Neo4j连接失败: {e}")
@@ -247,137 +397,70 @@ class PRRAGSystemV1:
             # 检查chunks数量
             chunks_dir = Path("data/chunks")
             if chunks_dir.exists():
-                chunk_files = list(chunks_dir.glob("*_chunks.json"))
-                print(f"✅ Chunks文件数量: {len(chunk_files)}")
+                # 只需计数：一次读目录即可，不逐个stat文件
+                with os.scandir(chunks_dir) as entries:
+                    chunk_count = sum(1 for entry in entries if entry.name.endswith("_chunks.json"))
+                print(f"✅ Chunks文件数量: {chunk_count}")
             
             # 检查Neo4j节点数量
-            node_count_query = "MATCH (n) RETURN count(n) as total_nodes"
-            result = graph.query(node_count_query)
-            total_nodes = result[0]['total_nodes']
-            print(f"✅ Neo4j总节点数: {total_nodes}")
+            print(f"✅ Neo4j总节点数: {counts['total_nodes']}")
             
             # 检查PR_Chunk节点
-            pr_chunk_query = "MATCH (n:PR_Chunk) RETURN count(n) as pr_chunks"
-            result = graph.query(pr_chunk_query)
-            pr_chunks = result[0]['pr_chunks']
-            print(f"✅ PR_Chunk节点数: {pr_chunks}")
+            print(f"✅ PR_Chunk节点数: {counts['pr_chunks']}")
             
         except Exception as e:
             print(f"⚠️ 状态检查部分失败: {e}")
 
+    def _query_node_counts(self, graph):
+        """查询总节点数和PR_Chunk节点数
+        
+        优先使用APOC的 apoc.meta.stats()（直接读取计数存储，无需全图扫描），
+        APOC不可用时回退到合并为一次往返的count查询。确认未安装APOC后不再尝试。
+        """
+        if self._apoc_available is not False:
+            try:
+                result = graph.query(
+                    "CALL apoc.meta.stats() YIELD nodeCount, labels "
+                    "RETURN nodeCount AS total_nodes, coalesce(labels['PR_Chunk'], 0) AS pr_chunks"
+                )
+                self._apoc_available = True
+                return result[0]
+            except Exception as e:
+                # 只有"过程不存在"才说明未安装APOC；连接中断等临时错误直接抛出，下次仍会尝试APOC
+                if self._apoc_available or not self._is_procedure_not_found(e):
+                    raise
+                self._apoc_available = False
+        
+        result = graph.query(
+            "CALL { MATCH (n) RETURN count(n) AS total_nodes } "
+            "CALL { MATCH (n:PR_Chunk) RETURN count(n) AS pr_chunks } "
+            "RETURN total_nodes, pr_chunks"
+        )
+        return result[0]
+
+    @staticmethod
+    def _is_procedure_not_found(error: Exception) -> bool:
+        """判断异常是否为调用的过程未注册（Neo.ClientError.Procedure.ProcedureNotFound）
+        
+        langchain的Neo4jGraph会把驱动异常包装成ValueError，错误码只保留在消息文本中，因此同时检查code和消息。
+        """
+        code = getattr(error, "code", None) or ""
+        message = str(error)
+        return ("ProcedureNotFound" in code or "ProcedureNotFound" in message
+                or "There is no procedure with the name" in message)
+
     def show_usage_guide(self):
         """显示使用指南"""
-        guide = """
-📚 公关传播RAG系统 v1.0 使用指南
-
-🎯 系统概述:
-   本系统是一个基于Neo4j的增强版公关传播知识图谱RAG系统，专门用于分析
-   公关公司案例、品牌传播方案等内容。
-
-🏗️ 核心功能:
-   1. 智能实体识别 - 识别品牌、企业、媒体、活动等实体
-   2. 关系提取 - 识别合作、竞争、媒体投放等关系
-   3. 增强RAG查询 - GraphRAG + VectorRAG双重查询能力
-   4. 多格式处理 - 支持PDF、Word、Excel、PPT等格式
-   5. 增量处理 - 只处理新文件，节省资源
-   6. Chunk编辑 - 人工优化数据质量
-
-📁 数据流程:
-   data/raw/ → 预处理 → data/cleaned/ → JSON转换 → data/json/ 
-   → 分块处理 → data/chunks/ → Neo4j集成 → 知识图谱
-
-🔍 查询模式:
-   • GraphRAG: 基于实体和关系的结构化查询
-   • VectorRAG: 基于语义相似性的向量查询
-   • 直接查询: 绕过预处理直接查询Neo4j
-
-📊 实体类型:
-   Brand(品牌), Company(企业), Agency(公关公司), Campaign(活动),
-   Strategy(策略), Media(媒体), Platform(平台), Influencer(意见领袖),
-   Content(内容), KPI(指标)
-
-🔗 关系类型:
-   COLLABORATES_WITH(合作), BRAND_COLLABORATION(品牌联名),
-   MEDIA_PLACEMENT(媒体投放), COMPETES_WITH(竞争),
-   LAUNCHES_CAMPAIGN(发起活动), USES_STRATEGY(使用策略)等
-
-💡 使用建议:
-   1. 首次使用选择"完整处理"模式
-   2. 后续更新数据使用"增量处理"模式
-   3. 查询时优先使用"增强RAG查询"
-   4. 定期使用"Chunk编辑"优化数据质量
-
-📞 技术支持:
-   如遇问题，请检查:
-   - .env文件配置是否正确
-   - Neo4j数据库是否正常运行
-   - 数据文件格式是否正确
-        """
-        print(guide)
+        print(USAGE_GUIDE)
 
     def show_system_architecture(self):
         """显示系统架构"""
-        architecture = """
-🏗️ 公关传播RAG系统 v1.0 架构图
+        print(SYSTEM_ARCHITECTURE)
 
-┌─────────────────────────────────────────────────────────────────┐
-│                        数据输入层                                │
-├─────────────────────────────────────────────────────────────────┤
-│  PDF, Word, Excel, PPT, HTML, JSON, TXT 等格式文档              │
-└─────────────────────────────────────────────────────────────────┘
-                                ↓
-┌─────────────────────────────────────────────────────────────────┐
-│                        预处理层                                  │
-├─────────────────────────────────────────────────────────────────┤
-│  pr_multi_format_preprocessing.py  →  pr_txt2json.py           │
-│  (多格式文本提取)                    →  (JSON转换)               │
-└─────────────────────────────────────────────────────────────────┘
-                                ↓
-┌─────────────────────────────────────────────────────────────────┐
-│                        分块处理层                                │
-├─────────────────────────────────────────────────────────────────┤
-│  pr_chunking.py  →  chunk_editor.py                             │
-│  (文本分块)        →  (人工编辑)                                  │
-└─────────────────────────────────────────────────────────────────┘
-                                ↓
-┌─────────────────────────────────────────────────────────────────┐
-│                        实体识别层                                │
-├─────────────────────────────────────────────────────────────────┤
-│  pr_entity_extractor.py  →  pr_enhanced_schema.py              │
-│  (实体关系提取)            →  (图谱模式定义)                      │
-└─────────────────────────────────────────────────────────────────┘
-                                ↓
-┌─────────────────────────────────────────────────────────────────┐
-│                        知识图谱层                                │
-├─────────────────────────────────────────────────────────────────┤
-│  pr_enhanced_neo4j_integration.py  →  Neo4j Database            │
-│  (Neo4j集成)                      →  (图数据库)                  │
-└─────────────────────────────────────────────────────────────────┘
-                                ↓
-┌─────────────────────────────────────────────────────────────────┐
-│                        RAG查询层                                 │
-├─────────────────────────────────────────────────────────────────┤
-│  pr_enhanced_rag.py  →  GraphRAG + VectorRAG                    │
-│  (增强RAG系统)        →  (双重查询能力)                           │
-└─────────────────────────────────────────────────────────────────┘
-                                ↓
-┌─────────────────────────────────────────────────────────────────┐
-│                        应用接口层                                │
-├─────────────────────────────────────────────────────────────────┤
-│  ask_pr.py, neo4j_direct_query.py, quick_query.py              │
-│  (多种查询接口)                                                   │
-└─────────────────────────────────────────────────────────────────┘
-
-🔧 核心组件说明:
-   • 数据预处理: 支持多种格式文档的文本提取
-   • 实体识别: 基于LLM+规则的智能实体提取
-   • 关系提取: 识别公关传播特有的关系类型
-   • 知识图谱: Neo4j存储实体和关系
-   • RAG查询: GraphRAG和VectorRAG双重能力
-   • 增量处理: 只处理新文件，提高效率
-   • Chunk编辑: 人工优化数据质量
-        """
-        print(architecture)
+    def _quit(self):
+        """退出系统"""
+        print("👋 感谢使用公关传播RAG系统 v1.0！")
+        self._should_exit = True
 
     def run(self):
         """运行主程序"""
@@ -389,40 +472,20 @@ class PRRAGSystemV1:
             return
         
         # 主循环
+        self._should_exit = False
         while True:
             try:
                 choice = self.show_main_menu()
                 
-                if choice == '1':
-                    self.run_full_processing()
-                elif choice == '2':
-                    self.run_incremental_processing()
-                elif choice == '3':
-                    self.run_chunk_editing()
-                elif choice == '4':
-                    self.run_upload_chunks_to_neo4j()
-                elif choice == '5':
-                    self.run_enhanced_rag()
-                elif choice == '6':
-                    self.run_direct_query()
-                elif choice == '7':
-                    self.run_quick_query()
-                elif choice == '8':
-                    self.run_demo()
-                elif choice == '9':
-                    self.run_tests()
-                elif choice == '10':
-                    self.check_system_status()
-                elif choice == '11':
-                    self.show_usage_guide()
-                elif choice == '12':
-                    self.show_system_architecture()
-                elif choice == '13':
-                    print("👋 感谢使用公关传播RAG系统 v1.0！")
-                    break
+                handler = self._menu.get(choice)
+                if handler:
+                    handler()
                 else:
                     print("❌ 无效选择，请重新输入")
                 
+                if self._should_exit:
+                    break
+                
                 input("\n按回车键继续...")
                 
             except KeyboardInterrupt:
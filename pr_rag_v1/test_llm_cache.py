@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+LLM响应缓存测试（不需要Neo4j和向量模型，使用桩向量模型）
+"""
+
+import sys
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent / "core"))
+import pr_llm_cache
+from pr_llm_cache import LLMResponseCache
+
+class CharHistogramModel:
+    """桩向量模型：按字符频次生成向量，文本只差几个字符时余弦相似度接近1"""
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def encode(self, text, normalize_embeddings=True):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for ch, count in Counter(text).items():
+            vector[ord(ch) % self.dim] += count
+        return vector / np.linalg.norm(vector)
+
+VARS = '{"enterprise_name":"小米汽车","enterprise_stage":"大型企业","industry":"汽车","market_type":"ToC","pr_goal":"品牌认知","pr_cycle":"6个月","pr_budget":"500万","innovation":"适度创新"}'
+NEAR_VARS = VARS.replace("500万", "520万")
+PARTITION = '{"enterprise_name":"小米汽车","provider":"openai","temperature":0.6,"max_tokens":2048,"context":"abc"}'
+
+@pytest.fixture
+def make_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(pr_llm_cache, "SENTENCE_TRANSFORMERS_AVAILABLE", True)
+    caches = []
+
+    def make(semantic=True):
+        cache = LLMResponseCache(db_path=str(tmp_path / f"cache{len(caches)}.sqlite"), semantic=semantic)
+        cache._embed_model = CharHistogramModel()
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        cache.close()
+
+def test_exact_hit(make_cache):
+    cache = make_cache(semantic=False)
+    cache.put("A", "gpt", VARS, "方案A", PARTITION)
+    assert cache.get("A", "gpt", VARS, PARTITION) == "方案A"
+    assert cache.get("B", "gpt", VARS, PARTITION) is None
+
+def test_near_duplicate_gets_semantic_hit(make_cache):
+    cache = make_cache()
+    cache.put("A", "gpt", VARS, "方案A", PARTITION)
+    # 精确键不同，同一分区内企业信息相近即命中
+    assert cache.make_key("A", "gpt", NEAR_VARS, PARTITION) != cache.make_key("A", "gpt", VARS, PARTITION)
+    assert cache.get("A", "gpt", NEAR_VARS, PARTITION) == "方案A"
+
+def test_semantic_hit_never_crosses_partitions(make_cache):
+    cache = make_cache()
+    cache.put("A", "gpt", VARS, "方案A", PARTITION)
+    other = PARTITION.replace("小米汽车", "理想汽车")
+    assert cache.get("A", "gpt", NEAR_VARS, other) is None
+
+def test_semantic_tier_is_opt_in(make_cache):
+    cache = make_cache(semantic=False)
+    cache.put("A", "gpt", VARS, "方案A", PARTITION)
+    assert cache.get("A", "gpt", NEAR_VARS, PARTITION) is None
+
+def test_cosine_kernel_matches_numpy():
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((64, 384)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    query = matrix[17] + 0.01 * rng.standard_normal(384).astype(np.float32)
+    query /= np.linalg.norm(query)
+
+    scores = pr_llm_cache._cosine_scores(query, matrix)
+    np.testing.assert_allclose(scores, matrix @ query, rtol=1e-4, atol=1e-5)
+    best, score = pr_llm_cache.top1_cosine(query, matrix)
+    assert best == 17
+    assert score == pytest.approx(float(matrix[17] @ query), abs=1e-5)
+
+def test_semantic_lookup_scores_through_kernel(make_cache, monkeypatch):
+    calls = []
+    kernel = pr_llm_cache._cosine_scores
+
+    def spy(query, matrix):
+        calls.append(matrix.shape)
+        return kernel(query, matrix)
+
+    monkeypatch.setattr(pr_llm_cache, "_cosine_scores", spy)
+    cache = make_cache()
+    cache.put("A", "gpt", VARS, "方案A", PARTITION)
+    cache.put("A", "gpt", VARS.replace("6个月", "12个月"), "方案A2", PARTITION)
+    assert cache.get("A", "gpt", NEAR_VARS, PARTITION) == "方案A"
+    assert calls == [(2, 512)]
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -3,12 +3,13 @@
 Neo4j连接测试脚本
 """
 
-from dotenv import load_dotenv
 import os
 import sys
 
 # 加载环境变量
-load_dotenv('.env', override=True)
+sys.path.append('core')
+from pr_env import ensure_env
+ensure_env()
 
 def test_neo4j_connection():
     """测试Neo4j连接"""
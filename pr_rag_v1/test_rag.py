@@ -5,14 +5,14 @@
 
 import sys
 import os
-from dotenv import load_dotenv
-
-# 加载环境变量
-load_dotenv('.env', override=True)
 
 # 添加路径
 sys.path.append('core')
 
+# 加载环境变量
+from pr_env import ensure_env
+ensure_env()
+
 def test_simple_query():
     """简单查询测试"""
     print("🔍 增强RAG查询测试")
@@ -34,21 +34,20 @@ def test_simple_query():
             "华与华超级符号案例有哪些？"
         ]
         
-        for i, question in enumerate(test_questions, 1):
+        try:
+            # 使用GraphRAG批量查询
+            print("📊 使用GraphRAG批量查询...")
+            answers = rag_system.query_batch(test_questions, use_graph=True)
+        except Exception as e:
+            print(f"❌ GraphRAG查询失败: {e}")
+            answers = []
+        print()
+        
+        for i, (question, answer) in enumerate(zip(test_questions, answers), 1):
             print(f"🤔 测试问题 {i}: {question}")
             print("-" * 50)
-            
-            try:
-                # 使用GraphRAG查询
-                print("📊 使用GraphRAG查询...")
-                answer = rag_system.query(question, use_graph=True)
-                print(f"🤖 GraphRAG回答:\n{answer}")
-                print()
-                
-            except Exception as e:
-                print(f"❌ GraphRAG查询失败: {e}")
-                print()
-            
+            print(f"🤖 GraphRAG回答:\n{answer}")
+            print()
             print("=" * 60)
             print()
         
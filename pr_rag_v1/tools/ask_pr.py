@@ -5,54 +5,85 @@
 """
 
 import sys
+from pathlib import Path
 import os
 import textwrap
-from dotenv import load_dotenv
-from langchain_community.graphs import Neo4jGraph
+from typing import Optional
+import numpy as np
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.vectorstores import Neo4jVector
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
 import warnings
 warnings.filterwarnings("ignore")
 
-# Load environment variables
-load_dotenv('.env', override=True)
+# 加载环境变量（整个进程只加载一次）
+sys.path.append(str(Path(__file__).parent.parent / "core"))
+from pr_env import ensure_env
+ensure_env()
 
-# Neo4j connection
-NEO4J_URI = os.getenv('NEO4J_URI')
-NEO4J_USERNAME = os.getenv('NEO4J_USERNAME')
-NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD')
-NEO4J_DATABASE = os.getenv('NEO4J_DATABASE') or 'neo4j'
+# 复用core中共享的Neo4j连接池（演示脚本经由本模块查询，同样共用）
+from pr_neo4j_env import get_graph
 
 # Initialize connections
-kg = Neo4jGraph(
-    url=NEO4J_URI, username=NEO4J_USERNAME, password=NEO4J_PASSWORD, database=NEO4J_DATABASE
-)
+kg = get_graph()
 
 llm = ChatOpenAI(temperature=0)
 embeddings = OpenAIEmbeddings()
 
-def ask_question(question):
-    """询问问题并获取回答"""
+# 向量索引（首次查询前必须已创建，见 demos/demo_direct_query.py 中的索引创建语句）
+VECTOR_INDEX_NAME = 'PR_OpenAI'
+
+# 直接走HNSW向量索引检索，避免退化为对全部PR_Chunk的暴力相似度计算
+VECTOR_SEARCH_QUERY = """
+CALL db.index.vector.queryNodes($index_name, $k, $embedding)
+YIELD node, score
+RETURN node.text AS text, score
+ORDER BY score DESC
+"""
+
+_vector_index_checked = False
+
+def ensure_vector_index():
+    """检查向量索引是否存在（每个进程只检查一次），不存在时抛出异常"""
+    global _vector_index_checked
+    if _vector_index_checked:
+        return
+    
+    result = kg.query(
+        "SHOW INDEXES YIELD name, type WHERE name = $name AND type = 'VECTOR' RETURN name",
+        params={'name': VECTOR_INDEX_NAME}
+    )
+    if not result:
+        raise RuntimeError(
+            f"向量索引 {VECTOR_INDEX_NAME} 不存在，请先在Neo4j中创建 PR_Chunk.textEmbeddingOpenAI 上的向量索引"
+        )
+    _vector_index_checked = True
+
+def ask_question(question, embedding: Optional[np.ndarray] = None):
+    """询问问题并获取回答
+    
+    Args:
+        question: 问题文本
+        embedding: 预先计算好的问题向量，提供时跳过嵌入API调用
+    """
     print(f"🤔 问题: {question}")
     print("=" * 80)
     
     try:
-        # 使用向量搜索
-        vector_store = Neo4jVector.from_existing_graph(
-            embedding=embeddings,
-            url=NEO4J_URI,
-            username=NEO4J_USERNAME,
-            password=NEO4J_PASSWORD,
-            index_name='PR_OpenAI',
-            node_label='PR_Chunk',
-            text_node_properties=['text'],
-            embedding_node_property='textEmbeddingOpenAI',
-        )
+        ensure_vector_index()
+        
+        # 生成问题向量（提供了预计算向量时跳过嵌入API调用）
+        if embedding is not None:
+            question_embedding = np.asarray(embedding, dtype=np.float32).tolist()
+        else:
+            question_embedding = embeddings.embed_query(question)
         
         # 搜索相关文档
-        docs = vector_store.similarity_search(question, k=5)
+        docs = kg.query(VECTOR_SEARCH_QUERY, params={
+            'index_name': VECTOR_INDEX_NAME,
+            'k': 5,
+            'embedding': question_embedding
+        })
         
         if not docs:
             return "❌ 未找到相关信息，请检查Neo4j数据库中是否有PR_Chunk节点"
@@ -60,7 +91,7 @@ def ask_question(question):
         print(f"📚 找到 {len(docs)} 个相关文档片段")
         
         # 构建上下文
-        context = "\n\n".join([doc.page_content for doc in docs])
+        context = "\n\n".join([doc['text'] for doc in docs])
         
         # 创建专业prompt
         prompt_template = """
@@ -6,14 +6,16 @@ Chunk结果人工编辑和Neo4j同步工具
 
 import json
 import os
+import sys
 from pathlib import Path
-from dotenv import load_dotenv
 from langchain_community.graphs import Neo4jGraph
 import warnings
 warnings.filterwarnings("ignore")
 
-# Load environment variables
-load_dotenv('.env', override=True)
+# 加载环境变量（整个进程只加载一次）
+sys.path.append(str(Path(__file__).parent.parent / "core"))
+from pr_env import ensure_env
+ensure_env()
 
 # Neo4j connection
 NEO4J_URI = os.getenv('NEO4J_URI')
@@ -3,23 +3,17 @@
 清理Neo4j中的历史数据（拿破仑、滑铁卢、Talleyrand相关）
 """
 
-from dotenv import load_dotenv
-import os
-from langchain_community.graphs import Neo4jGraph
+import sys
+from pathlib import Path
 import warnings
 warnings.filterwarnings("ignore")
 
-# Load environment variables
-load_dotenv('.env', override=True)
-NEO4J_URI = os.getenv('NEO4J_URI')
-NEO4J_USERNAME = os.getenv('NEO4J_USERNAME')
-NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD')
-NEO4J_DATABASE = os.getenv('NEO4J_DATABASE') or 'neo4j'
-
+# 复用core中共享的Neo4j连接
+sys.path.append(str(Path(__file__).parent.parent / "core"))
 print("Connecting to Neo4j...")
-kg = Neo4jGraph(
-    url=NEO4J_URI, username=NEO4J_USERNAME, password=NEO4J_PASSWORD, database=NEO4J_DATABASE
-)
+from pr_neo4j_env import get_graph
+
+kg = get_graph()
 
 def cleanup_historical_data():
     """清理历史数据"""
@@ -5,16 +5,22 @@
 
 import json
 import os
+import sys
+import mmap
+import argparse
 import hashlib
 from pathlib import Path
+from functools import cache
 from datetime import datetime
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
 from langchain_community.graphs import Neo4jGraph
 import warnings
 warnings.filterwarnings("ignore")
 
-# Load environment variables
-load_dotenv('.env', override=True)
+# 加载环境变量（整个进程只加载一次）
+sys.path.append(str(Path(__file__).parent.parent / "core"))
+from pr_env import ensure_env
+ensure_env()
 
 # Neo4j connection
 NEO4J_URI = os.getenv('NEO4J_URI')
@@ -22,25 +28,57 @@ NEO4J_USERNAME = os.getenv('NEO4J_USERNAME')
 NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD')
 NEO4J_DATABASE = os.getenv('NEO4J_DATABASE') or 'neo4j'
 
-kg = Neo4jGraph(
-    url=NEO4J_URI, username=NEO4J_USERNAME, password=NEO4J_PASSWORD, database=NEO4J_DATABASE
-)
+@cache
+def get_kg():
+    """首次使用时才建立Neo4j连接，之后复用（仅导入模块或查看帮助时不连接数据库）"""
+    return Neo4jGraph(
+        url=NEO4J_URI, username=NEO4J_USERNAME, password=NEO4J_PASSWORD, database=NEO4J_DATABASE
+    )
+
+# 文件变更检测使用的哈希算法：优先xxHash（比MD5快一个数量级），未安装时退回标准库的BLAKE2b
+try:
+    import xxhash
+    HASH_ALGO = "xxh3_64"
+except ImportError:
+    xxhash = None
+    HASH_ALGO = "blake2b"
+
+# 读取文件时的块大小
+HASH_BLOCK_SIZE = 1 << 20
+# 超过该大小的文件使用mmap计算哈希
+MMAP_THRESHOLD = 16 << 20
+
+def _new_hasher(algo):
+    """按算法名创建哈希对象"""
+    if algo == "xxh3_64":
+        return xxhash.xxh3_64()
+    return hashlib.new(algo)
 
 class IncrementalProcessor:
     def __init__(self):
         self.processed_file = "data/processed_files.json"
+        self.processed_log = "data/processed_files.jsonl"
+        self.compact_ratio = 10  # 日志大小超过快照的倍数时合并
         self.chunks_dir = Path("data/chunks")
         self.cleaned_dir = Path("data/cleaned")
         self.json_dir = Path("data/json")
+        self.hash_workers = 8  # 并行计算文件哈希的线程数
         
-    def get_file_hash(self, file_path):
-        """计算文件MD5哈希值"""
-        hash_md5 = hashlib.md5()
+    def get_file_hash(self, file_path, algo=HASH_ALGO):
+        """计算文件内容哈希值（默认使用非加密的快速哈希，仅用于变更检测）"""
+        hasher = _new_hasher(algo)
         try:
             with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+                size = os.fstat(f.fileno()).st_size
+                if size > MMAP_THRESHOLD:
+                    # 大文件直接映射到内存整体哈希，省去逐块读取的Python循环
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        hasher.update(mm)
+                else:
+                    # 小文件（含空文件，空文件无法mmap）按块读取
+                    for chunk in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                        hasher.update(chunk)
+            return hasher.hexdigest()
         except Exception as e:
             print(f"计算文件哈希失败 {file_path}: {e}")
             return None
@@ -53,44 +91,124 @@ class IncrementalProcessor:
             "name": file_path.name,
             "size": stat.st_size,
             "modified": stat.st_mtime,
-            "hash": self.get_file_hash(file_path)
+            "hash": self.get_file_hash(file_path),
+            "hash_algo": HASH_ALGO
         }
     
     def load_processed_files(self):
-        """加载已处理文件记录"""
+        """加载已处理文件记录（快照 + 追加日志回放）"""
         if os.path.exists(self.processed_file):
             with open(self.processed_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {
-            "files": {},
-            "chunks": {},
-            "last_processed": None
-        }
+                data = json.load(f)
+        else:
+            data = {
+                "files": {},
+                "chunks": {},
+                "last_processed": None
+            }
+        
+        # 回放快照之后追加的处理记录
+        if os.path.exists(self.processed_log):
+            with open(self.processed_log, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 进程中断时最后一行可能不完整
+                        continue
+                    if "baseline_counts" in entry:
+                        data["baseline_counts"] = entry["baseline_counts"]
+                        continue
+                    data["files"][entry["path"]] = entry["info"]
+                    data["last_processed"] = entry["processed_at"]
+        
+        return data
     
     def save_processed_files(self, data):
-        """保存已处理文件记录"""
+        """保存已处理文件记录快照，快照已包含全部记录，随后清空追加日志"""
         os.makedirs(os.path.dirname(self.processed_file), exist_ok=True)
-        with open(self.processed_file, 'w', encoding='utf-8') as f:
+        tmp_file = self.processed_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.processed_file)
+        
+        if os.path.exists(self.processed_log):
+            os.remove(self.processed_log)
     
-    def is_file_processed(self, file_path, processed_data):
-        """检查文件是否已处理"""
-        file_info = self.get_file_info(file_path)
+    def compact(self, data):
+        """追加日志超过快照大小的一定倍数时，将记录合并写回快照"""
+        if not os.path.exists(self.processed_log):
+            return
+        
+        log_size = os.path.getsize(self.processed_log)
+        snapshot_size = os.path.getsize(self.processed_file) if os.path.exists(self.processed_file) else 0
+        if log_size > snapshot_size * self.compact_ratio:
+            self.save_processed_files(data)
+    
+    def is_file_processed(self, file_path, processed_data, stat=None):
+        """检查文件是否已处理
+        
+        先比较文件大小和修改时间（只需一次stat），两者都未变化时直接认为已处理；
+        否则再计算哈希比较内容，内容未变时更新记录中的修改时间，下次即可走快速路径。
+        """
         file_path_str = str(file_path)
+        stored_info = processed_data["files"].get(file_path_str)
+        if not stored_info:
+            return False
+        
+        stat = stat or file_path.stat()
+        if stored_info.get("size") == stat.st_size and stored_info.get("modified") == stat.st_mtime:
+            return True
         
-        if file_path_str in processed_data["files"]:
-            stored_info = processed_data["files"][file_path_str]
-            # 比较哈希值，如果相同则认为已处理
-            if stored_info.get("hash") == file_info["hash"]:
-                return True
+        # 比较哈希值，如果相同则认为已处理
+        # 旧记录没有hash_algo字段，使用的是MD5；按记录自身的算法比较，匹配后升级为当前算法
+        stored_algo = stored_info.get("hash_algo", "md5")
+        if stored_info.get("hash") == self.get_file_hash(file_path, stored_algo):
+            if stored_algo != HASH_ALGO:
+                stored_info["hash"] = self.get_file_hash(file_path)
+                stored_info["hash_algo"] = HASH_ALGO
+            stored_info["size"] = stat.st_size
+            stored_info["modified"] = stat.st_mtime
+            return True
         
         return False
     
     def mark_file_processed(self, file_path, processed_data):
-        """标记文件为已处理"""
+        """标记文件为已处理，并立即追加写入日志（每个文件O(1)写入，进程中断也不丢失进度）"""
         file_info = self.get_file_info(file_path)
+        processed_at = datetime.now().isoformat()
         processed_data["files"][str(file_path)] = file_info
-        processed_data["last_processed"] = datetime.now().isoformat()
+        processed_data["last_processed"] = processed_at
+        
+        self.append_log({
+            "path": str(file_path),
+            "info": file_info,
+            "processed_at": processed_at
+        })
+    
+    def append_log(self, entry):
+        """向处理记录日志追加一行"""
+        os.makedirs(os.path.dirname(self.processed_log), exist_ok=True)
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with open(self.processed_log, 'a+b') as f:
+            # 进程中断可能留下不完整的最后一行，先补一个换行，避免新记录接在其后、回放时被一并跳过
+            if os.fstat(f.fileno()).st_size > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = "\n" + line
+            f.write(line.encode('utf-8'))
+    
+    def record_baseline_counts(self, counts, processed_data):
+        """记录Neo4j统计基线，后续运行据此增量推算，无需全图计数"""
+        processed_data["baseline_counts"] = counts
+        self.append_log({"baseline_counts": counts})
+    
+    def invalidate_baseline_counts(self, processed_data):
+        """写入Neo4j后作废统计基线，下次检查状态时重新查询数据库"""
+        if processed_data.get("baseline_counts") is not None:
+            self.record_baseline_counts(None, processed_data)
     
     def get_new_files(self, input_dir):
         """获取需要处理的新文件"""
@@ -98,21 +216,40 @@ class IncrementalProcessor:
         new_files = []
         
         # 支持的文件格式
-        supported_extensions = ['.pdf', '.xlsx', '.xls', '.csv', '.docx', '.doc', 
-                              '.pptx', '.ppt', '.html', '.htm', '.json', '.txt']
+        supported_extensions = {'.pdf', '.xlsx', '.xls', '.csv', '.docx', '.doc', 
+                                '.pptx', '.ppt', '.html', '.htm', '.json', '.txt'}
         
         input_path = Path(input_dir)
         if not input_path.exists():
             print(f"输入目录不存在: {input_dir}")
             return new_files
         
-        for file_path in input_path.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in supported_extensions:
-                if not self.is_file_processed(file_path, processed_data):
-                    new_files.append(file_path)
-                    print(f"🆕 发现新文件: {file_path.name}")
-                else:
-                    print(f"⏭️  跳过已处理文件: {file_path.name}")
+        # os.scandir 一次读目录即可判断文件类型，stat结果缓存在DirEntry上供后续比较使用
+        candidates = []
+        with os.scandir(input_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in supported_extensions:
+                    candidates.append((Path(entry.path), entry.stat()))
+        
+        mtimes_before = {path: info.get("modified") for path, info in processed_data["files"].items()}
+        
+        # 文件哈希计算以IO为主，用线程池并行读取
+        with ThreadPoolExecutor(max_workers=self.hash_workers) as executor:
+            processed_flags = list(executor.map(
+                lambda candidate: self.is_file_processed(candidate[0], processed_data, stat=candidate[1]),
+                candidates
+            ))
+        
+        # 内容未变但修改时间变化的文件已更新记录，保存下来使下次运行跳过哈希计算
+        if any(info.get("modified") != mtimes_before[path] for path, info in processed_data["files"].items()):
+            self.save_processed_files(processed_data)
+        
+        for (file_path, _), processed in zip(candidates, processed_flags):
+            if not processed:
+                new_files.append(file_path)
+                print(f"🆕 发现新文件: {file_path.name}")
+            else:
+                print(f"⏭️  跳过已处理文件: {file_path.name}")
         
         return new_files
     
@@ -133,81 +270,122 @@ class IncrementalProcessor:
         # 加载已处理文件记录
         processed_data = self.load_processed_files()
         
-        # 处理每个新文件
-        for file_path in new_files:
-            print(f"\n📄 处理文件: {file_path.name}")
-            
-            try:
-                # 1. 预处理
-                print("  🔄 预处理...")
-                from pr_multi_format_preprocessing import process_multi_format_documents
-                process_multi_format_documents(input_dir, "data/cleaned")
-                
-                # 2. JSON转换
-                print("  📋 JSON转换...")
-                from pr_txt2json import process_pr_text_files
-                process_pr_text_files()
-                
-                # 3. 分块
-                print("  ✂️ 分块...")
-                from pr_chunking import process_all_pr_files
-                chunks = process_all_pr_files()
-                
-                # 4. Neo4j集成
-                print("  🔗 Neo4j集成...")
-                from pr_neo4j_simple import main as neo4j_main
-                neo4j_main()
-                
-                # 标记文件为已处理
-                self.mark_file_processed(file_path, processed_data)
-                print(f"  ✅ 文件处理完成: {file_path.name}")
-                
-            except Exception as e:
-                print(f"  ❌ 处理失败: {file_path.name} - {e}")
-                continue
+        from pr_multi_format_preprocessing import preprocess_file
+        from pr_txt2json import convert_text_file
+        from pr_chunking import split_pr_data_from_file
+        from upload_chunks_to_neo4j import ChunksUploader
+        
+        # 各阶段只针对本批新文件执行一次，不再对整个目录重复处理
+        # pending: 原始文件 -> 当前阶段的产物路径，某阶段失败的文件从中移除
+        pending = {file_path: file_path for file_path in new_files}
+        
+        def run_stage(label, step):
+            print(f"\n{label}")
+            for file_path, current in list(pending.items()):
+                try:
+                    result = step(current)
+                    error = ""
+                except Exception as e:
+                    result = None
+                    error = f" - {e}"
+                if result is None:
+                    print(f"  ❌ 处理失败: {file_path.name}{error}")
+                    del pending[file_path]
+                else:
+                    pending[file_path] = result
+        
+        def chunk_step(json_path):
+            if not split_pr_data_from_file(str(json_path)):
+                return None
+            return self.chunks_dir / f"{Path(json_path).stem}_chunks.json"
         
-        # 保存处理记录
-        self.save_processed_files(processed_data)
-        print(f"\n🎉 增量处理完成！处理了 {len(new_files)} 个新文件")
+        # 1. 预处理
+        run_stage("  🔄 预处理...", lambda path: preprocess_file(path, str(self.cleaned_dir)))
+        
+        # 2. JSON转换
+        run_stage("  📋 JSON转换...", lambda path: convert_text_file(path, str(self.json_dir)))
+        
+        # 3. 分块
+        run_stage("  ✂️ 分块...", chunk_step)
+        
+        # 4. Neo4j集成（只上传本批新生成的chunks文件）
+        if pending:
+            with ChunksUploader() as uploader:
+                if uploader.session:
+                    print("\n  🔗 Neo4j集成...")
+                    uploader.create_indexes()
+                    run_stage("  📤 上传chunks...", lambda path: path if uploader.upload_file_chunks(path) else None)
+                    # 上传会改变节点、关系等各项统计，基线整体作废
+                    self.invalidate_baseline_counts(processed_data)
+                else:
+                    pending.clear()
+        
+        # 标记文件为已处理
+        for file_path in pending:
+            self.mark_file_processed(file_path, processed_data)
+            print(f"  ✅ 文件处理完成: {file_path.name}")
+        
+        # 处理记录已逐个追加到日志，日志过大时合并回快照
+        self.compact(processed_data)
+        print(f"\n🎉 增量处理完成！处理了 {len(pending)}/{len(new_files)} 个新文件")
     
-    def check_neo4j_status(self):
-        """检查Neo4j中的节点状态"""
+    def check_neo4j_status(self, verify=False):
+        """检查Neo4j中的节点状态
+        
+        默认使用上次记录的统计基线；verify为True、尚无基线或基线已因写入作废时才执行全图计数查询。
+        """
         print("\n📊 检查Neo4j状态...")
         
+        processed_data = self.load_processed_files()
+        baseline = processed_data.get("baseline_counts")
+        if baseline and not verify:
+            print(f"  PR_Chunk节点数量: {baseline['chunk_count']}")
+            print(f"  NEXT关系数量: {baseline['next_count']}")
+            print(f"  向量索引数量: {baseline['vector_index_count']}")
+            print("  💡 以上为缓存统计，使用 --verify 重新查询数据库")
+            return
+        
         try:
             # 检查PR_Chunk节点数量
             chunk_count_query = "MATCH (c:PR_Chunk) RETURN count(c) as count"
-            result = kg.query(chunk_count_query)
+            result = get_kg().query(chunk_count_query)
             chunk_count = result[0]['count'] if result else 0
             print(f"  PR_Chunk节点数量: {chunk_count}")
             
             # 检查NEXT关系数量
             next_count_query = "MATCH ()-[r:NEXT]->() RETURN count(r) as count"
-            result = kg.query(next_count_query)
+            result = get_kg().query(next_count_query)
             next_count = result[0]['count'] if result else 0
             print(f"  NEXT关系数量: {next_count}")
             
             # 检查向量索引
             index_query = "SHOW INDEXES"
-            indexes = kg.query(index_query)
+            indexes = get_kg().query(index_query)
             vector_indexes = [idx for idx in indexes if 'vector' in str(idx).lower()]
             print(f"  向量索引数量: {len(vector_indexes)}")
             
+            self.record_baseline_counts({
+                "chunk_count": chunk_count,
+                "next_count": next_count,
+                "vector_index_count": len(vector_indexes)
+            }, processed_data)
+            
         except Exception as e:
             print(f"  ❌ 检查Neo4j状态失败: {e}")
     
     def cleanup_orphaned_chunks(self):
-        """清理孤立的chunks（可选功能）"""
+        """清理孤立的chunks（可选功能）：来源chunks文件已删除的PR_Chunk节点"""
         print("\n🧹 清理孤立chunks...")
         
         try:
-            # 查找没有NEXT关系的chunks
+            # 查找来源chunks文件已不存在的chunks（上传时记录了file_name；上传不创建NEXT关系，不能据此判断）
+            file_names = [f.stem.replace('_chunks', '') for f in self.chunks_dir.glob('*_chunks.json')]
             orphaned_query = """
             MATCH (c:PR_Chunk)
-            WHERE NOT (c)-[:NEXT]->() AND NOT ()-[:NEXT]->(c)
+            WHERE c.file_name IS NOT NULL AND NOT c.file_name IN $file_names
             RETURN count(c) as count
             """
-            result = kg.query(orphaned_query)
+            result = get_kg().query(orphaned_query, {"file_names": file_names})
             orphaned_count = result[0]['count'] if result else 0
             
             if orphaned_count > 0:
@@ -216,24 +394,26 @@ class IncrementalProcessor:
                 if cleanup_choice == 'y':
                     delete_query = """
                     MATCH (c:PR_Chunk)
-                    WHERE NOT (c)-[:NEXT]->() AND NOT ()-[:NEXT]->(c)
-                    DELETE c
+                    WHERE c.file_name IS NOT NULL AND NOT c.file_name IN $file_names
+                    DETACH DELETE c
                     """
-                    kg.query(delete_query)
+                    get_kg().query(delete_query, {"file_names": file_names})
                     print("  ✅ 孤立chunks已清理")
+                    
+                    self.invalidate_baseline_counts(self.load_processed_files())
             else:
                 print("  ✅ 没有发现孤立chunks")
                 
         except Exception as e:
             print(f"  ❌ 清理失败: {e}")
     
-    def run(self):
+    def run(self, verify=False):
         """运行增量处理器"""
         print("🚀 增量处理系统")
         print("=" * 60)
         
         # 检查Neo4j状态
-        self.check_neo4j_status()
+        self.check_neo4j_status(verify=verify)
         
         # 处理新文件
         self.process_new_files()
@@ -244,7 +424,11 @@ class IncrementalProcessor:
             self.cleanup_orphaned_chunks()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="增量处理系统")
+    parser.add_argument("--verify", action="store_true", help="重新查询数据库获取准确的节点统计")
+    args = parser.parse_args()
+    
     processor = IncrementalProcessor()
-    processor.run()
+    processor.run(verify=args.verify)
 
 
@@ -6,8 +6,9 @@ Neo4j直接查询系统
 """
 
 import os
+import sys
+from pathlib import Path
 import textwrap
-from dotenv import load_dotenv
 from langchain_community.graphs import Neo4jGraph
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_community.vectorstores import Neo4jVector
@@ -16,8 +17,10 @@ from langchain.chains import LLMChain
 import warnings
 warnings.filterwarnings("ignore")
 
-# Load environment variables
-load_dotenv('.env', override=True)
+# 加载环境变量（整个进程只加载一次）
+sys.path.append(str(Path(__file__).parent.parent / "core"))
+from pr_env import ensure_env
+ensure_env()
 
 # Neo4j connection
 NEO4J_URI = os.getenv('NEO4J_URI')
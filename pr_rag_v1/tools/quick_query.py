@@ -4,18 +4,22 @@
 """
 
 import os
+import sys
+import asyncio
+from pathlib import Path
+from functools import cache
 import textwrap
-from dotenv import load_dotenv
 from langchain_community.graphs import Neo4jGraph
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_community.vectorstores import Neo4jVector
 from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
 import warnings
 warnings.filterwarnings("ignore")
 
-# Load environment variables
-load_dotenv('.env', override=True)
+# 加载环境变量（整个进程只加载一次）
+sys.path.append(str(Path(__file__).parent.parent / "core"))
+from pr_env import ensure_env
+ensure_env()
 
 # Neo4j connection
 NEO4J_URI = os.getenv('NEO4J_URI')
@@ -23,13 +27,67 @@ NEO4J_USERNAME = os.getenv('NEO4J_USERNAME')
 NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD')
 NEO4J_DATABASE = os.getenv('NEO4J_DATABASE') or 'neo4j'
 
-# Initialize connections
-kg = Neo4jGraph(
-    url=NEO4J_URI, username=NEO4J_USERNAME, password=NEO4J_PASSWORD, database=NEO4J_DATABASE
+# 连接和模型客户端在首次使用时才创建，之后复用（仅导入模块时不建立连接）
+@cache
+def get_kg():
+    """获取Neo4j连接"""
+    return Neo4jGraph(
+        url=NEO4J_URI, username=NEO4J_USERNAME, password=NEO4J_PASSWORD, database=NEO4J_DATABASE
+    )
+
+@cache
+def get_llm():
+    """获取LLM客户端"""
+    return ChatOpenAI(temperature=0)
+
+@cache
+def get_embeddings():
+    """获取向量模型客户端"""
+    return OpenAIEmbeddings()
+
+# 专业问答prompt
+PROMPT_TEMPLATE = """
+        你是一个专业的公关传播和品牌营销专家。基于以下公关传播相关内容，回答用户的问题。
+        
+        相关内容：
+        {context}
+        
+        问题：{question}
+        
+        请基于这些内容，给出专业、详细、实用的回答。回答要求：
+        1. 基于提供的具体内容进行回答
+        2. 结合公关传播和品牌营销的专业知识
+        3. 提供具体可行的建议和策略
+        4. 回答要专业、准确、有针对性
+        5. 如果内容不够充分，可以结合你的专业知识进行补充
+        
+        请用中文回答。
+        """
+
+# 问答prompt在模块加载时构建一次
+PROMPT = PromptTemplate(
+    input_variables=["context", "question"],
+    template=PROMPT_TEMPLATE
 )
 
-llm = ChatOpenAI(temperature=0)
-embeddings = OpenAIEmbeddings()
+@cache
+def get_chain():
+    """获取问答链 prompt | llm，首次调用时构建，之后直接复用"""
+    return PROMPT | get_llm()
+
+@cache
+def get_store():
+    """获取Neo4j向量存储，首次调用时构建，之后直接复用"""
+    return Neo4jVector.from_existing_graph(
+        embedding=get_embeddings(),
+        url=NEO4J_URI,
+        username=NEO4J_USERNAME,
+        password=NEO4J_PASSWORD,
+        index_name='PR_OpenAI',
+        node_label='PR_Chunk',
+        text_node_properties=['text'],
+        embedding_node_property='textEmbeddingOpenAI',
+    )
 
 def quick_query(question):
     """快速查询函数"""
@@ -37,20 +95,8 @@ def quick_query(question):
     print("=" * 80)
     
     try:
-        # 使用向量搜索
-        vector_store = Neo4jVector.from_existing_graph(
-            embedding=embeddings,
-            url=NEO4J_URI,
-            username=NEO4J_USERNAME,
-            password=NEO4J_PASSWORD,
-            index_name='PR_OpenAI',
-            node_label='PR_Chunk',
-            text_node_properties=['text'],
-            embedding_node_property='textEmbeddingOpenAI',
-        )
-        
         # 搜索相关文档
-        docs = vector_store.similarity_search(question, k=5)
+        docs = get_store().similarity_search(question, k=5)
         
         if not docs:
             return "未找到相关信息"
@@ -60,37 +106,52 @@ def quick_query(question):
         # 构建上下文
         context = "\n\n".join([doc.page_content for doc in docs])
         
-        # 创建专业prompt
-        prompt_template = """
-        你是一个专业的公关传播和品牌营销专家。基于以下公关传播相关内容，回答用户的问题。
+        response = get_chain().invoke({"context": context, "question": question}).content
         
-        相关内容：
-        {context}
+        return response
         
-        问题：{question}
+    except Exception as e:
+        return f"查询失败: {e}"
+
+async def quick_query_async(questions):
+    """批量快速查询：一次请求生成全部问题的向量，并发检索，批量调用LLM，返回回答列表"""
+    print(f"🤔 批量查询 {len(questions)} 个问题")
+    print("=" * 80)
+    
+    try:
+        vector_store = get_store()
         
-        请基于这些内容，给出专业、详细、实用的回答。回答要求：
-        1. 基于提供的具体内容进行回答
-        2. 结合公关传播和品牌营销的专业知识
-        3. 提供具体可行的建议和策略
-        4. 回答要专业、准确、有针对性
-        5. 如果内容不够充分，可以结合你的专业知识进行补充
+        # 一次请求生成所有问题的向量
+        vectors = await get_embeddings().aembed_documents(questions)
         
-        请用中文回答。
-        """
+        # 并发检索各问题的相关文档
+        docs_list = await asyncio.gather(*(
+            vector_store.asimilarity_search_by_vector(vector, k=5) for vector in vectors
+        ))
         
-        prompt = PromptTemplate(
-            input_variables=["context", "question"],
-            template=prompt_template
-        )
+        answers = ["未找到相关信息"] * len(questions)
+        pending = []
+        inputs = []
+        for i, (question, docs) in enumerate(zip(questions, docs_list)):
+            if not docs:
+                continue
+            print(f"📚 问题{i + 1}: 找到 {len(docs)} 个相关文档片段")
+            pending.append(i)
+            inputs.append({
+                "context": "\n\n".join([doc.page_content for doc in docs]),
+                "question": question
+            })
         
-        chain = LLMChain(llm=llm, prompt=prompt)
-        response = chain.run(context=context, question=question)
+        # 批量调用LLM，请求并发发出
+        if inputs:
+            results = await get_chain().abatch(inputs)
+            for i, result in zip(pending, results):
+                answers[i] = result.content
         
-        return response
+        return answers
         
     except Exception as e:
-        return f"查询失败: {e}"
+        return [f"查询失败: {e}"] * len(questions)
 
 def main():
     """主函数 - 快速查询示例"""
@@ -114,14 +175,15 @@ def main():
     print("2. 在代码中调用: quick_query('你的问题')")
     print("3. 交互式查询: python3 neo4j_direct_query.py")
     
-    # 测试一个示例问题
+    # 批量测试全部示例问题
     print(f"\n🧪 测试查询:")
-    test_question = "美妆类品牌应该如何建立和消费者的联系"
-    answer = quick_query(test_question)
+    answers = asyncio.run(quick_query_async(example_questions))
     
-    print(f"\n🤖 回答:")
-    print("-" * 40)
-    print(textwrap.fill(answer, 80))
+    for question, answer in zip(example_questions, answers):
+        print(f"\n🤔 问题: {question}")
+        print(f"🤖 回答:")
+        print("-" * 40)
+        print(textwrap.fill(answer, 80))
 
 if __name__ == "__main__":
     main()
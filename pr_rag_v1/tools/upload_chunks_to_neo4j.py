@@ -5,23 +5,95 @@ Chunks上传到Neo4j数据库工具
 """
 
 import os
+import csv
 import json
 import sys
+import time
+import shutil
+import argparse
+import subprocess
 from pathlib import Path
 from datetime import datetime
-from dotenv import load_dotenv
-from langchain_community.graphs import Neo4jGraph
+from typing import Any, Dict, List
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from neo4j import GraphDatabase
 import warnings
 warnings.filterwarnings("ignore")
 
-# 加载环境变量
-load_dotenv('.env', override=True)
+# 可选：orjson解析JSON比标准库快数倍，未安装时使用json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 加载环境变量（整个进程只加载一次）
+sys.path.append(str(Path(__file__).parent.parent / "core"))
+from pr_env import ensure_env
+ensure_env()
+
+# Cypher语句只定义一次，每次调用发送完全相同的查询文本，参数类型保持一致，
+# 服务器端执行计划缓存可持续命中，不会因文本或参数类型变化而重新规划
+BRAND_UPSERT_CYPHER = """
+UNWIND $rows AS row
+MERGE (b:Brand {name: row.name})
+SET b.industry = row.industry,
+    b.last_mentioned = $created_at
+"""
+
+# 批量语句末尾的事务分批子句取决于服务器版本，由 get_transactions_clause 填入
+# chunk节点与其品牌关系在同一子查询中写入，每批一次往返（品牌节点已提前写入，这里只MATCH品牌并MERGE关系）
+CHUNK_BATCH_CYPHER = """
+UNWIND $rows AS row
+CALL {{
+    WITH row
+    MERGE (c:PR_Chunk {{chunk_id: row.chunk_id}})
+    SET c += row.props
+    WITH c, row
+    UNWIND row.props.brand_mentions AS brand_name
+    MATCH (b:Brand {{name: brand_name}})
+    MERGE (c)-[:MENTIONS_BRAND]->(b)
+}} {transactions}
+"""
+
+# neo4j-admin import 的数组分隔符：使用控制字符 U+001F（单元分隔符），品牌名中出现时会被去掉，保证不会把一个品牌拆成多个
+ARRAY_DELIMITER = "\x1f"
+ARRAY_DELIMITER_ARG = "U+001F"
+
+def normalize_brand_mentions(metadata: Dict[str, Any]) -> List[str]:
+    """将brand_mentions统一为去重（保持顺序）的字符串列表，缺失或为None时返回[]"""
+    return list(dict.fromkeys(
+        str(brand).replace(ARRAY_DELIMITER, "") for brand in (metadata.get('brand_mentions') or [])
+    ))
+
+def normalize_chunk(chunk_data: Dict[str, Any]) -> Dict[str, Any]:
+    """统一chunk记录格式
+    
+    pr_chunking 输出扁平记录（chunkId、content_type、industry、brand_mentioned），
+    转换为上传使用的 {'id', 'text', 'metadata'} 格式，保证chunk_id稳定、重复上传时按键MERGE；已是该格式的记录原样返回。
+    """
+    if 'chunkId' not in chunk_data or 'id' in chunk_data:
+        return chunk_data
+    return {
+        'id': chunk_data['chunkId'],
+        'text': chunk_data.get('text', ''),
+        'metadata': {
+            'content_type': chunk_data.get('content_type', 'unknown'),
+            'industry': chunk_data.get('industry', 'unknown'),
+            'brand_mentions': chunk_data.get('brand_mentioned') or []
+        }
+    }
 
 class ChunksUploader:
     """Chunks上传到Neo4j数据库类"""
     
     def __init__(self):
         self.chunks_dir = Path("data/chunks")
+        self.import_dir = Path("data/import")  # 离线批量导入的CSV输出目录
+        self.batch_size = 1000  # 每次请求发送的行数
+        self.tx_rows = 500  # 每个内部事务提交的行数
+        self.server_version = None
+        self.nodes_created = 0  # 本次上传新建的PR_Chunk节点数（供调用方增量更新统计）
         self.neo4j_config = {
             'uri': os.getenv('NEO4J_URI'),
             'username': os.getenv('NEO4J_USERNAME'),
@@ -29,18 +101,62 @@ class ChunksUploader:
             'database': os.getenv('NEO4J_DATABASE') or 'neo4j'
         }
         
-        # 初始化Neo4j连接
+        # 初始化Neo4j连接：直接使用Bolt驱动，整个上传过程复用同一个session
+        self.driver = None
+        self.session = None
+        self.connect()
+    
+    def connect(self, quiet=False):
+        """建立Neo4j驱动和session，返回连接失败的异常（成功时为None）
+        
+        quiet为True时不打印连接结果，由调用方决定何时报告（如重试等待时只在超时后报告一次）。
+        """
         try:
-            self.graph = Neo4jGraph(
-                url=self.neo4j_config['uri'],
-                username=self.neo4j_config['username'],
-                password=self.neo4j_config['password'],
-                database=self.neo4j_config['database']
+            self.driver = GraphDatabase.driver(
+                self.neo4j_config['uri'],
+                auth=(self.neo4j_config['username'], self.neo4j_config['password'])
             )
-            print("✅ Neo4j连接成功")
+            self.driver.verify_connectivity()
+            self.session = self.driver.session(database=self.neo4j_config['database'])
+            if not quiet:
+                print("✅ Neo4j连接成功")
+            return None
         except Exception as e:
-            print(f"❌ Neo4j连接失败: {e}")
-            self.graph = None
+            if not quiet:
+                print(f"❌ Neo4j连接失败: {e}")
+            self.close()
+            return e
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """关闭session和驱动"""
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+        if self.driver is not None:
+            self.driver.close()
+            self.driver = None
+    
+    def write(self, query, params=None):
+        """在显式写事务中执行查询，返回记录字典列表"""
+        return self.session.execute_write(lambda tx: tx.run(query, params or {}).data())
+    
+    def read(self, query, params=None):
+        """在显式读事务中执行查询，返回记录字典列表"""
+        return self.session.execute_read(lambda tx: tx.run(query, params or {}).data())
+    
+    def write_batched(self, query, params=None):
+        """执行带 CALL {...} IN TRANSACTIONS 的查询
+        
+        这类查询由服务器自行分批提交，只能在自动提交事务中运行，不能放进execute_write。
+        返回查询摘要，可从中读取写入计数。
+        """
+        return self.session.run(query, params or {}).consume()
     
     def check_chunks_files(self):
         """检查chunks文件"""
@@ -59,6 +175,8 @@ class ChunksUploader:
     def load_chunks_data(self, chunk_file):
         """加载chunks数据"""
         try:
+            if orjson is not None:
+                return orjson.loads(Path(chunk_file).read_bytes())
             with open(chunk_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             return data
@@ -66,168 +184,251 @@ class ChunksUploader:
             print(f"❌ 加载文件失败 {chunk_file}: {e}")
             return None
     
-    def create_chunk_node(self, chunk_data, file_name):
-        """创建chunk节点"""
-        try:
-            # 提取chunk信息
-            chunk_id = chunk_data.get('id', f"{file_name}_{datetime.now().timestamp()}")
-            text = chunk_data.get('text', '')
-            metadata = chunk_data.get('metadata', {})
-            
-            # 创建节点属性
-            node_properties = {
-                'chunk_id': chunk_id,
-                'text': text,
-                'file_name': file_name,
-                'content_type': metadata.get('content_type', 'unknown'),
-                'industry': metadata.get('industry', 'unknown'),
-                'brand_mentions': metadata.get('brand_mentions', []),
-                'created_at': datetime.now().isoformat(),
-                'source_file': file_name
-            }
-            
-            # 创建Cypher查询
-            cypher_query = """
-            MERGE (c:PR_Chunk {chunk_id: $chunk_id})
-            SET c.text = $text,
-                c.file_name = $file_name,
-                c.content_type = $content_type,
-                c.industry = $industry,
-                c.brand_mentions = $brand_mentions,
-                c.created_at = $created_at,
-                c.source_file = $source_file
-            RETURN c
-            """
-            
-            result = self.graph.query(cypher_query, node_properties)
-            return True
-            
-        except Exception as e:
-            print(f"❌ 创建节点失败: {e}")
-            return False
+    def get_server_version(self):
+        """获取Neo4j服务器版本号 (major, minor)，结果缓存在实例上"""
+        if self.server_version is None:
+            try:
+                result = self.read(
+                    "CALL dbms.components() YIELD name, versions "
+                    "WHERE name = 'Neo4j Kernel' RETURN versions[0] AS version"
+                )
+                parts = result[0]['version'].split('.')
+                self.server_version = (int(parts[0]), int(parts[1]))
+            except Exception as e:
+                print(f"⚠️ 无法获取Neo4j版本，按旧版本处理: {e}")
+                self.server_version = (0, 0)
+        return self.server_version
     
-    def create_relationships(self, chunk_data, file_name):
-        """创建关系"""
-        try:
+    def get_transactions_clause(self, concurrent=True):
+        """根据服务器版本生成 CALL {...} 子查询的事务分批子句
+        
+        Neo4j 5.21+ 支持 IN CONCURRENT TRANSACTIONS 并行提交内部事务，
+        4.4+ 支持 IN TRANSACTIONS 分批提交，更早的版本不分批。
+        """
+        version = self.get_server_version()
+        if concurrent and version >= (5, 21):
+            return f"IN CONCURRENT TRANSACTIONS OF {self.tx_rows} ROWS"
+        if version >= (4, 4):
+            return f"IN TRANSACTIONS OF {self.tx_rows} ROWS"
+        return ""
+    
+    def build_upload_rows(self, chunks, file_name):
+        """将chunks转换为批量上传用的参数行，返回 (chunk行, 品牌提及行)"""
+        created_at = datetime.now().isoformat()
+        chunk_rows = []
+        brand_rows = []
+        
+        for chunk_data in chunks:
+            chunk_id = str(chunk_data.get('id', f"{file_name}_{datetime.now().timestamp()}"))
             metadata = chunk_data.get('metadata', {})
-            brand_mentions = metadata.get('brand_mentions', [])
-            
-            if not brand_mentions:
-                return True
+            industry = metadata.get('industry', 'unknown')
+            brand_mentions = normalize_brand_mentions(metadata)
             
-            chunk_id = chunk_data.get('id', f"{file_name}_{datetime.now().timestamp()}")
+            chunk_rows.append({
+                'chunk_id': chunk_id,
+                'props': {
+                    'text': chunk_data.get('text', ''),
+                    'file_name': file_name,
+                    'content_type': metadata.get('content_type', 'unknown'),
+                    'industry': industry,
+                    'brand_mentions': brand_mentions,
+                    'created_at': created_at,
+                    'source_file': file_name
+                }
+            })
             
-            # 为每个品牌创建关系
             for brand in brand_mentions:
-                # 创建品牌节点
-                brand_query = """
-                MERGE (b:Brand {name: $brand_name})
-                SET b.industry = $industry,
-                    b.last_mentioned = $created_at
-                """
-                
-                self.graph.query(brand_query, {
-                    'brand_name': brand,
-                    'industry': metadata.get('industry', 'unknown'),
-                    'created_at': datetime.now().isoformat()
-                })
-                
-                # 创建chunk与品牌的关系
-                relationship_query = """
-                MATCH (c:PR_Chunk {chunk_id: $chunk_id})
-                MATCH (b:Brand {name: $brand_name})
-                MERGE (c)-[:MENTIONS_BRAND]->(b)
-                """
-                
-                self.graph.query(relationship_query, {
+                brand_rows.append({
                     'chunk_id': chunk_id,
                     'brand_name': brand
                 })
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ 创建关系失败: {e}")
-            return False
+        
+        return chunk_rows, brand_rows
+    
+    def extract_chunks(self, chunks_data):
+        """从加载的数据中取出chunks列表（统一为上传格式），格式不支持时返回None"""
+        if isinstance(chunks_data, dict) and 'chunks' in chunks_data:
+            chunks_data = chunks_data['chunks']
+        if isinstance(chunks_data, list):
+            return [normalize_chunk(chunk_data) for chunk_data in chunks_data]
+        return None
+    
+    def count_brand_industries(self, chunks, counts=None):
+        """统计chunks中每个品牌在各行业下的提及次数，返回 Counter{(品牌, 行业): 次数}（可累加到已有counts）"""
+        counts = Counter() if counts is None else counts
+        for chunk_data in chunks:
+            metadata = chunk_data.get('metadata', {})
+            industry = metadata.get('industry', 'unknown')
+            counts.update((name, industry) for name in normalize_brand_mentions(metadata))
+        return counts
+    
+    def brand_rows_from_counts(self, counts):
+        """每个品牌一行：取提及次数最多的行业（非unknown优先，次数相同按行业名排序），结果与文件顺序无关"""
+        industries = defaultdict(dict)
+        for (name, industry), count in counts.items():
+            industries[name][industry] = count
+        
+        return [
+            {'name': name, 'industry': min(by_industry, key=lambda ind: (ind == 'unknown', -by_industry[ind], ind))}
+            for name, by_industry in sorted(industries.items())
+        ]
+    
+    def collect_brands(self, chunks_list):
+        """汇总所有chunks中提及的品牌，返回去重后的品牌行（每个品牌一行）"""
+        counts = Counter()
+        for chunks in chunks_list:
+            self.count_brand_industries(chunks, counts)
+        return self.brand_rows_from_counts(counts)
+    
+    def count_file_brands(self, chunk_file):
+        """读取单个chunks文件只统计品牌，不保留chunks（供全量上传前的品牌预扫描）"""
+        chunks_data = self.load_chunks_data(chunk_file)
+        chunks = self.extract_chunks(chunks_data) if chunks_data else None
+        return self.count_brand_industries(chunks or [])
+    
+    def upsert_brands(self, brand_rows):
+        """一次性批量写入品牌节点，每个品牌只MERGE一次"""
+        created_at = datetime.now().isoformat()
+        for start in range(0, len(brand_rows), self.batch_size):
+            batch = brand_rows[start:start + self.batch_size]
+            try:
+                self.write(BRAND_UPSERT_CYPHER, {'rows': batch, 'created_at': created_at})
+            except Exception as e:
+                print(f"❌ 创建品牌节点失败: {e}")
+        
+        print(f"✅ 品牌节点写入完成: {len(brand_rows)} 个")
     
     def upload_file_chunks(self, chunk_file):
         """上传单个文件的chunks"""
+        return self.upload_loaded_chunks(chunk_file, self.load_chunks_data(chunk_file))
+    
+    def upload_loaded_chunks(self, chunk_file, chunks_data, brands_upserted=False):
+        """上传已加载的单个文件chunks（chunk节点与品牌关系按批次UNWIND写入，每批一次往返）
+        
+        brands_upserted为True时表示品牌节点已由调用方统一写入，这里只MATCH品牌并创建关系。
+        """
         file_name = chunk_file.stem.replace('_chunks', '')
         print(f"\n📤 处理文件: {file_name}")
         
-        # 加载数据
-        chunks_data = self.load_chunks_data(chunk_file)
         if not chunks_data:
             return False
         
         # 检查数据格式
-        if isinstance(chunks_data, list):
-            chunks = chunks_data
-        elif isinstance(chunks_data, dict) and 'chunks' in chunks_data:
-            chunks = chunks_data['chunks']
-        else:
+        chunks = self.extract_chunks(chunks_data)
+        if chunks is None:
             print(f"❌ 不支持的数据格式: {file_name}")
             return False
         
+        # 单独上传一个文件时，先写入该文件涉及的品牌
+        if not brands_upserted:
+            self.upsert_brands(self.collect_brands([chunks]))
+        
         success_count = 0
         total_count = len(chunks)
         
         print(f"📊 开始上传 {total_count} 个chunks...")
         
-        for i, chunk in enumerate(chunks, 1):
+        chunk_rows, _ = self.build_upload_rows(chunks, file_name)
+        
+        for start in range(0, total_count, self.batch_size):
+            batch = chunk_rows[start:start + self.batch_size]
+            # 各行chunk_id互不相同，没有品牌关系的批次可并发写入；
+            # 有品牌关系时同一品牌会出现在多行中，并发事务会争抢同一Brand节点的锁，因此串行分批提交
+            has_mentions = any(row['props']['brand_mentions'] for row in batch)
+            chunk_query = CHUNK_BATCH_CYPHER.format(transactions=self.get_transactions_clause(concurrent=not has_mentions))
             try:
-                # 创建chunk节点
-                if self.create_chunk_node(chunk, file_name):
-                    # 创建关系
-                    self.create_relationships(chunk, file_name)
-                    success_count += 1
-                
-                if i % 10 == 0:
-                    print(f"  进度: {i}/{total_count} ({i/total_count*100:.1f}%)")
-                    
+                summary = self.write_batched(chunk_query, {'rows': batch})
+                self.nodes_created += summary.counters.nodes_created
+                success_count += len(batch)
+                print(f"  进度: {success_count}/{total_count} ({success_count/total_count*100:.1f}%)")
             except Exception as e:
-                print(f"❌ 处理chunk {i} 失败: {e}")
+                print(f"❌ 创建节点失败 (第 {start + 1}-{start + len(batch)} 个chunk): {e}")
         
         print(f"✅ {file_name}: {success_count}/{total_count} chunks上传成功")
         return success_count > 0
     
-    def create_indexes(self):
-        """创建索引以提高查询性能"""
+    def create_unique_constraint(self, name, label, prop):
+        """为 label.prop 创建唯一约束（约束自带查找索引），返回是否成功
+        
+        唯一约束与同属性上的独立范围索引不能共存，只有确认没有重复值后才删除旧索引；
+        有重复值或创建失败时保留（或补建）范围索引，保证仍有查找索引可用。
+        """
+        if self.read("SHOW CONSTRAINTS YIELD name WHERE name = $name RETURN name", {'name': name}):
+            return True
+        
+        fallback_index = f"CREATE INDEX IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+        duplicates = self.read(
+            f"MATCH (n:{label}) WHERE n.{prop} IS NOT NULL "
+            f"WITH n.{prop} AS key, count(*) AS c WHERE c > 1 RETURN count(key) AS duplicates"
+        )
+        if duplicates and duplicates[0]['duplicates']:
+            print(f"⚠️ {label}.{prop} 存在 {duplicates[0]['duplicates']} 个重复值，跳过唯一约束，保留范围索引")
+            self.write(fallback_index)
+            return False
+        
+        redundant_indexes = self.read("""
+        SHOW INDEXES YIELD name, type, labelsOrTypes, properties, owningConstraint
+        WHERE type = 'RANGE' AND owningConstraint IS NULL
+          AND labelsOrTypes = [$label] AND properties = [$prop]
+        RETURN name
+        """, {'label': label, 'prop': prop})
+        for record in redundant_indexes:
+            self.write(f"DROP INDEX `{record['name']}` IF EXISTS")
+        
         try:
-            indexes = [
-                "CREATE INDEX IF NOT EXISTS FOR (c:PR_Chunk) ON (c.chunk_id)",
-                "CREATE INDEX IF NOT EXISTS FOR (c:PR_Chunk) ON (c.file_name)",
-                "CREATE INDEX IF NOT EXISTS FOR (c:PR_Chunk) ON (c.content_type)",
-                "CREATE INDEX IF NOT EXISTS FOR (b:Brand) ON (b.name)",
-                "CREATE INDEX IF NOT EXISTS FOR (b:Brand) ON (b.industry)"
-            ]
-            
-            for index_query in indexes:
-                self.graph.query(index_query)
-            
-            print("✅ 索引创建完成")
+            self.write(f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE")
             return True
-            
         except Exception as e:
-            print(f"❌ 创建索引失败: {e}")
+            print(f"❌ 创建唯一约束失败 {name}: {e}")
+            self.write(fallback_index)
             return False
     
+    def create_indexes(self):
+        """创建约束和索引以提高查询性能（需在批量MERGE之前执行）
+        
+        每条语句单独执行，某一条失败不影响其余约束和索引的创建。
+        """
+        ok = True
+        
+        # 唯一约束让MERGE按键O(1)查找，而不是扫描整个标签
+        for name, label, prop in [("pr_chunk_id", "PR_Chunk", "chunk_id"), ("brand_name", "Brand", "name")]:
+            try:
+                ok = self.create_unique_constraint(name, label, prop) and ok
+            except Exception as e:
+                print(f"❌ 创建约束失败 {name}: {e}")
+                ok = False
+        
+        indexes = [
+            "CREATE INDEX IF NOT EXISTS FOR (c:PR_Chunk) ON (c.file_name)",
+            "CREATE INDEX IF NOT EXISTS FOR (c:PR_Chunk) ON (c.content_type)",
+            "CREATE INDEX IF NOT EXISTS FOR (b:Brand) ON (b.industry)"
+        ]
+        for index_query in indexes:
+            try:
+                self.write(index_query)
+            except Exception as e:
+                print(f"❌ 创建索引失败: {e}")
+                ok = False
+        
+        print("✅ 约束和索引创建完成" if ok else "⚠️ 部分约束或索引未能创建")
+        return ok
+    
     def get_upload_stats(self):
         """获取上传统计信息"""
         try:
             # 统计chunk数量
             chunk_count_query = "MATCH (c:PR_Chunk) RETURN count(c) as chunk_count"
-            result = self.graph.query(chunk_count_query)
+            result = self.read(chunk_count_query)
             chunk_count = result[0]['chunk_count'] if result else 0
             
             # 统计品牌数量
             brand_count_query = "MATCH (b:Brand) RETURN count(b) as brand_count"
-            result = self.graph.query(brand_count_query)
+            result = self.read(brand_count_query)
             brand_count = result[0]['brand_count'] if result else 0
             
             # 统计关系数量
             relationship_count_query = "MATCH ()-[r]->() RETURN count(r) as relationship_count"
-            result = self.graph.query(relationship_count_query)
+            result = self.read(relationship_count_query)
             relationship_count = result[0]['relationship_count'] if result else 0
             
             return {
@@ -246,7 +447,7 @@ class ChunksUploader:
         print("=" * 60)
         
         # 检查Neo4j连接
-        if not self.graph:
+        if not self.session:
             print("❌ Neo4j连接失败，无法继续")
             return False
         
@@ -263,9 +464,19 @@ class ChunksUploader:
         success_files = 0
         total_files = len(chunk_files)
         
-        for chunk_file in chunk_files:
-            if self.upload_file_chunks(chunk_file):
-                success_files += 1
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            # 先流式预扫描全部文件的品牌（每个文件只保留品牌计数），一次性写入，避免同一品牌在每次提及时重复MERGE
+            print("\n🏷️ 写入品牌节点...")
+            brand_counts = Counter()
+            for counts in executor.map(self.count_file_brands, chunk_files):
+                brand_counts.update(counts)
+            self.upsert_brands(self.brand_rows_from_counts(brand_counts))
+            
+            # 多线程并行读取和解析chunks文件，解析完一个即上传一个，读取与上传重叠进行
+            loaded = executor.map(self.load_chunks_data, chunk_files)
+            for chunk_file, chunks_data in zip(chunk_files, loaded):
+                if self.upload_loaded_chunks(chunk_file, chunks_data, brands_upserted=True):
+                    success_files += 1
         
         # 显示统计信息
         print("\n📊 上传完成统计:")
@@ -285,13 +496,165 @@ class ChunksUploader:
         
         return success_files > 0
 
+    def export_csv(self, chunks_list):
+        """将chunks导出为neo4j-admin import所需的CSV文件，返回CSV路径字典
+        
+        chunks_list: [(chunks文件路径, chunks列表), ...]
+        """
+        self.import_dir.mkdir(parents=True, exist_ok=True)
+        paths = {
+            'chunks': self.import_dir / "pr_chunks.csv",
+            'brands': self.import_dir / "brands.csv",
+            'mentions': self.import_dir / "mentions.csv"
+        }
+        
+        created_at = datetime.now().isoformat()
+        mentions = set()
+        
+        with open(paths['chunks'], 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([
+                'chunk_id:ID(PR_Chunk)', 'text', 'file_name', 'content_type', 'industry',
+                'brand_mentions:string[]', 'created_at', 'source_file'
+            ])
+            for chunk_file, chunks in chunks_list:
+                file_name = chunk_file.stem.replace('_chunks', '')
+                chunk_rows, brand_rows = self.build_upload_rows(chunks, file_name)
+                for row in chunk_rows:
+                    props = row['props']
+                    writer.writerow([
+                        row['chunk_id'], props['text'], props['file_name'], props['content_type'],
+                        props['industry'], ARRAY_DELIMITER.join(props['brand_mentions']),
+                        props['created_at'], props['source_file']
+                    ])
+                mentions.update((row['chunk_id'], row['brand_name']) for row in brand_rows)
+        
+        with open(paths['brands'], 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['name:ID(Brand)', 'industry', 'last_mentioned'])
+            for brand in self.collect_brands([chunks for _, chunks in chunks_list]):
+                writer.writerow([brand['name'], brand['industry'], created_at])
+        
+        with open(paths['mentions'], 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([':START_ID(PR_Chunk)', ':END_ID(Brand)'])
+            writer.writerows(sorted(mentions))
+        
+        print(f"✅ CSV导出完成: {self.import_dir}")
+        return paths
+    
+    def wait_for_server(self, timeout=120):
+        """等待Neo4j重启后可以连接，重试期间不打印失败信息，超时后报告一次最后的错误"""
+        deadline = time.time() + timeout
+        error = None
+        while time.time() < deadline:
+            error = self.connect(quiet=True)
+            if self.session:
+                print("✅ Neo4j连接成功")
+                return True
+            time.sleep(5)
+        print(f"❌ Neo4j连接失败（等待 {timeout} 秒后超时）: {error}")
+        return False
+    
+    def confirm_overwrite(self, force=False):
+        """离线导入会覆盖整个目标数据库：库非空时需要 --force 或交互确认，返回是否继续"""
+        if force:
+            return True
+        if not self.session:
+            print("❌ 无法连接Neo4j确认数据库为空，如确需覆盖请使用 --force")
+            return False
+        
+        node_count = self.read("MATCH (n) RETURN count(n) AS count")[0]['count']
+        if node_count == 0:
+            return True
+        
+        print(f"⚠️ 数据库 {self.neo4j_config['database']} 中已有 {node_count} 个节点，离线导入将覆盖整个数据库（包括实体图谱等其他数据）")
+        answer = input("确认覆盖? 输入 yes 继续: ").strip().lower()
+        return answer == "yes"
+    
+    def run_bulk(self, force=False):
+        """首次全量导入：导出CSV后用neo4j-admin离线导入，绕过事务层
+        
+        注意：import full 会覆盖目标数据库，只适用于空库的初次加载，且需在Neo4j服务器所在机器上运行。
+        数据库非空时拒绝执行，除非 force 为True或用户交互确认。
+        """
+        print("🚀 启动Chunks离线批量导入流程...")
+        print("=" * 60)
+        
+        neo4j_bin = shutil.which("neo4j")
+        neo4j_admin = shutil.which("neo4j-admin")
+        if not neo4j_bin or not neo4j_admin:
+            print("❌ 未找到 neo4j / neo4j-admin 命令，请在Neo4j服务器上运行或将其加入PATH")
+            return False
+        
+        if not self.confirm_overwrite(force):
+            print("⏹️ 已取消离线导入")
+            return False
+        
+        chunk_files = self.check_chunks_files()
+        if not chunk_files:
+            return False
+        
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            loaded = list(executor.map(self.load_chunks_data, chunk_files))
+        
+        chunks_list = []
+        for chunk_file, chunks_data in zip(chunk_files, loaded):
+            chunks = self.extract_chunks(chunks_data) if chunks_data else None
+            if chunks:
+                chunks_list.append((chunk_file, chunks))
+        if not chunks_list:
+            print("❌ 没有可导入的chunks")
+            return False
+        
+        paths = self.export_csv(chunks_list)
+        
+        # 离线导入要求数据库停止运行
+        self.close()
+        try:
+            print("\n⏹️ 停止Neo4j...")
+            subprocess.run([neo4j_bin, "stop"], check=True)
+            
+            print("📥 执行neo4j-admin离线导入...")
+            subprocess.run([
+                neo4j_admin, "database", "import", "full",
+                f"--nodes=PR_Chunk={paths['chunks']}",
+                f"--nodes=Brand={paths['brands']}",
+                f"--relationships=MENTIONS_BRAND={paths['mentions']}",
+                "--skip-duplicate-nodes=true",
+                f"--array-delimiter={ARRAY_DELIMITER_ARG}",
+                "--multiline-fields=true",
+                "--overwrite-destination=true",
+                self.neo4j_config['database']
+            ], check=True)
+        except subprocess.CalledProcessError as e:
+            print(f"❌ 离线导入失败: {e}")
+            return False
+        finally:
+            print("▶️ 启动Neo4j...")
+            subprocess.run([neo4j_bin, "start"])
+        
+        # 离线导入不会创建约束和索引，重启后补建
+        if not self.wait_for_server():
+            print("❌ Neo4j重启后无法连接，请稍后手动执行索引创建")
+            return False
+        self.create_indexes()
+        
+        print("\n🎉 离线批量导入完成！")
+        return True
+
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="Chunks上传到Neo4j工具")
+    parser.add_argument("--bulk", action="store_true", help="首次加载时使用neo4j-admin离线批量导入（会覆盖目标数据库）")
+    parser.add_argument("--force", action="store_true", help="与--bulk同用：数据库非空时也不经确认直接覆盖")
+    args = parser.parse_args()
+    
     print("📤 Chunks上传到Neo4j工具")
     print("=" * 60)
     
-    uploader = ChunksUploader()
-    success = uploader.run()
+    with ChunksUploader() as uploader:
+        success = uploader.run_bulk(force=args.force) if args.bulk else uploader.run()
     
     if success:
         print("\n✅ 上传成功！")
@@ -5,27 +5,151 @@
 """
 
 import os
+import re
 import json
+import copy
+import hashlib
+import atexit
+import threading
+import asyncio
 import argparse
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, AsyncIterator, Mapping
+from functools import lru_cache
+from types import MappingProxyType
 from pathlib import Path
 from datetime import datetime
-import yaml
 
-# 导入现有RAG系统组件
+# 现有RAG系统组件（core）和pr_agent_v2组件较重，在首次用到时才导入
 import sys
 sys.path.append('core')
-from pr_enhanced_rag import EnhancedPRRAGSystem
-from pr_entity_extractor import EntityRelationshipExtractor
-from pr_neo4j_env import *
-
-# 导入pr_agent_v2组件
 sys.path.append('pr_agent_v2')
-from pr_marketing_agent_v3 import GraphRAG, llm_complete
-from templates.prompts import (
-    A_GRAPHIC_BRIEF, B_VIDEO_SCRIPT, C_CAMPAIGN_PLAN,
-    D_SHORTVIDEO_SCRIPT, E_XHS_NOTE, F_CRISIS_PLAN
-)
+
+# 加载环境变量（默认配置中的Neo4j参数来自环境变量）
+from pr_env import ensure_env
+ensure_env()
+
+# 性能埋点（PR_PROFILE=1 时启用Logfire，否则为空操作）
+from pr_profile import instrument
+
+# 可选：pyahocorasick 一次扫描匹配全部关键词，未安装时使用等价的正则多选一模式（同样只扫描一遍）
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# 可选：orjson序列化比标准库快数倍，原生输出非ASCII字符；未安装时使用json生成相同的紧凑格式
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps_text(obj: Any) -> str:
+    """序列化为紧凑JSON文本（保留中文字符）"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+# 查询关键词 -> 标签 (字段, 值)，用于判断查询模式和解析企业信息
+KEYWORD_TAGS = {
+    "方案": ("mode", "plan_generation"),
+    "策划": ("mode", "plan_generation"),
+    "计划": ("mode", "plan_generation"),
+    "生成": ("mode", "plan_generation"),
+    "实体": ("mode", "entity_analysis"),
+    "关系": ("mode", "entity_analysis"),
+    "分析": ("mode", "entity_analysis"),
+    "初创": ("enterprise_stage", "初创企业"),
+    "大型": ("enterprise_stage", "大型国企央企"),
+    "ToB": ("market_type", "ToB"),
+    "ToG": ("market_type", "ToG"),
+}
+
+def _build_keyword_matcher():
+    """构建关键词匹配器，返回函数：text -> 命中的标签集合"""
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for keyword, tag in KEYWORD_TAGS.items():
+            automaton.add_word(keyword, tag)
+        automaton.make_automaton()
+        
+        def match(text: str) -> set:
+            return {tag for _, tag in automaton.iter(text)}
+    else:
+        pattern = re.compile("|".join(map(re.escape, KEYWORD_TAGS)))
+        
+        def match(text: str) -> set:
+            return {KEYWORD_TAGS[m.group()] for m in pattern.finditer(text)}
+    
+    return match
+
+match_keywords = _build_keyword_matcher()
+
+# 产出代码 -> templates.prompts 中的任务说明模板名
+TASK_TEMPLATE_NAMES = {
+    "A": "A_GRAPHIC_TASK",
+    "B": "B_VIDEO_TASK",
+    "C": "C_CAMPAIGN_TASK",
+    "D": "D_SHORTVIDEO_TASK",
+    "E": "E_XHS_TASK",
+    "F": "F_CRISIS_TASK"
+}
+
+@lru_cache(maxsize=256)
+def _serialize_info(items: tuple) -> str:
+    """企业信息JSON；按 (键, 值) 元组缓存，同一企业重复生成方案时不再重新序列化"""
+    return dumps_text(dict(items))
+
+def serialize_enterprise_info(enterprise_info: Mapping[str, Any]) -> str:
+    """序列化企业信息，值不可哈希（如列表）时直接序列化"""
+    try:
+        return _serialize_info(tuple(enterprise_info.items()))
+    except TypeError:
+        return dumps_text(dict(enterprise_info))
+
+@lru_cache(maxsize=1024)
+def _enterprise_info_for_tags(tags: frozenset) -> Mapping[str, Any]:
+    """由关键词标签得到企业信息；结果只取决于标签集合，按标签缓存，返回只读视图防止调用方修改缓存"""
+    # 简单的解析逻辑，实际应用中可以使用更复杂的NLP
+    enterprise_info = {
+        "enterprise_name": "示例企业",
+        "enterprise_stage": "中小微企业",
+        "industry": "科技",
+        "market_type": "ToC",
+        "pr_goal": "品牌认知",
+        "pr_cycle": "3个月",
+        "pr_budget": "100万",
+        "innovation": "适度创新"
+    }
+    
+    if ("enterprise_stage", "初创企业") in tags:
+        enterprise_info["enterprise_stage"] = "初创企业"
+    elif ("enterprise_stage", "大型国企央企") in tags:
+        enterprise_info["enterprise_stage"] = "大型国企央企"
+    
+    if ("market_type", "ToB") in tags:
+        enterprise_info["market_type"] = "ToB"
+    elif ("market_type", "ToG") in tags:
+        enterprise_info["market_type"] = "ToG"
+    
+    return MappingProxyType(enterprise_info)
+
+# 进程内共享的组件：(组件类型, 相关配置...) -> 组件实例
+# 多个UnifiedPRSystem实例（如Web服务每个请求一个）复用同一套RAG组件，不再重复打开向量库和Neo4j连接
+_SHARED_COMPONENTS: Dict[tuple, Any] = {}
+_COMPONENTS_LOCK = threading.Lock()
+
+def _shared_component(key: tuple, factory):
+    """返回key对应的共享组件，不存在时调用factory创建；带close方法的组件在进程退出时关闭"""
+    with _COMPONENTS_LOCK:
+        if key not in _SHARED_COMPONENTS:
+            component = factory()
+            if hasattr(component, "close"):
+                atexit.register(component.close)
+            _SHARED_COMPONENTS[key] = component
+        return _SHARED_COMPONENTS[key]
+
+# 已解析的配置：(配置路径, 修改时间) -> 配置字典；文件修改后键随之变化，自动重新解析
+_CONFIG_CACHE: Dict[tuple, Dict[str, Any]] = {}
 
 class UnifiedPRSystem:
     """统一的公关传播智能体系统"""
@@ -36,16 +160,24 @@ class UnifiedPRSystem:
         self.rag_system = None
         self.graph_rag = None
         self.entity_extractor = None
+        self.llm_cache = None
         self.llm_config = self.config.get('llm', {})
         
-        # 初始化组件
-        self._init_components()
+        # 组件在各功能首次调用时按需初始化，只使用某一模式时不加载其余组件
     
     def load_config(self, config_path: str) -> Dict[str, Any]:
         """加载配置文件"""
+        import yaml
+        
         if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+            key = (os.path.abspath(config_path), os.path.getmtime(config_path))
+            if key not in _CONFIG_CACHE:
+                # 优先使用libyaml的C加载器，未编译libyaml时回退到纯Python的SafeLoader
+                loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+                with open(config_path, 'r', encoding='utf-8') as f:
+                    _CONFIG_CACHE[key] = yaml.load(f, Loader=loader)
+            # 返回副本，调用方修改配置不会影响缓存
+            return copy.deepcopy(_CONFIG_CACHE[key])
         else:
             # 创建默认配置
             return self.create_default_config(config_path)
@@ -73,6 +205,12 @@ class UnifiedPRSystem:
                 'top_k': 10,
                 'max_context_chars': 16000
             },
+            'llm_cache': {
+                'enabled': True,
+                'db_path': './data/llm_cache.sqlite',
+                'semantic_enabled': False,
+                'similarity_threshold': 0.95
+            },
             'paths': {
                 'output_dir': './outputs',
                 'data_dir': './data'
@@ -80,40 +218,87 @@ class UnifiedPRSystem:
         }
         
         # 保存默认配置
+        import yaml
         with open(config_path, 'w', encoding='utf-8') as f:
             yaml.dump(default_config, f, default_flow_style=False, allow_unicode=True)
         
         return default_config
     
-    def _init_components(self):
-        """初始化各个组件"""
+    @instrument("UnifiedPRSystem._init_components")
+    def _init_components(self, *components: str):
+        """按需初始化组件，只导入所需模块
+        
+        components: "rag"（增强RAG系统）、"extractor"（实体提取器）、"plan"（图RAG与LLM响应缓存）
+        """
         try:
-            # 初始化增强RAG系统
-            self.rag_system = EnhancedPRRAGSystem()
-            print("✅ 增强RAG系统初始化成功")
-            
-            # 初始化实体提取器
-            self.entity_extractor = EntityRelationshipExtractor()
-            print("✅ 实体提取器初始化成功")
+            if "rag" in components and self.rag_system is None:
+                def create_rag():
+                    from pr_enhanced_rag import EnhancedPRRAGSystem
+                    
+                    # 初始化增强RAG系统
+                    rag_system = EnhancedPRRAGSystem()
+                    print("✅ 增强RAG系统初始化成功")
+                    return rag_system
+                
+                self.rag_system = _shared_component(("rag",), create_rag)
             
-            # 初始化图RAG（pr_agent_v2的组件）
-            neo4j_config = self.config['neo4j']
-            vector_config = self.config['vector_store']
+            if "extractor" in components and self.entity_extractor is None:
+                def create_extractor():
+                    from pr_entity_extractor import EntityRelationshipExtractor
+                    
+                    # 初始化实体提取器
+                    entity_extractor = EntityRelationshipExtractor()
+                    print("✅ 实体提取器初始化成功")
+                    return entity_extractor
+                
+                self.entity_extractor = _shared_component(("extractor",), create_extractor)
             
-            self.graph_rag = GraphRAG(
-                persist_dir=vector_config['persist_dir'],
-                neo4j_uri=neo4j_config['uri'],
-                neo4j_user=neo4j_config['user'],
-                neo4j_pwd=neo4j_config['password'],
-                top_k=self.config['retrieval']['top_k']
-            )
-            print("✅ 图RAG系统初始化成功")
+            if "plan" in components and self.graph_rag is None:
+                # LLM响应缓存（精确匹配，语义相似匹配需显式开启）
+                cache_config = self.config.get('llm_cache', {})
+                if cache_config.get('enabled', True) and self.llm_cache is None:
+                    db_path = cache_config.get('db_path', './data/llm_cache.sqlite')
+                    semantic = cache_config.get('semantic_enabled', False)
+                    similarity_threshold = cache_config.get('similarity_threshold', 0.95)
+                    
+                    def create_cache():
+                        from pr_llm_cache import LLMResponseCache
+                        return LLMResponseCache(db_path=db_path, similarity_threshold=similarity_threshold, semantic=semantic)
+                    
+                    self.llm_cache = _shared_component(("llm_cache", db_path, semantic, similarity_threshold), create_cache)
+                
+                # 初始化图RAG（pr_agent_v2的组件），使用进程内共享的Neo4j驱动，驱动在进程退出时关闭
+                neo4j_config = self.config['neo4j']
+                vector_config = self.config['vector_store']
+                top_k = self.config['retrieval']['top_k']
+                
+                def create_graph_rag():
+                    from pr_marketing_agent_v3 import GraphRAG, get_shared_driver
+                    
+                    graph_rag = GraphRAG(
+                        persist_dir=vector_config['persist_dir'],
+                        neo4j_uri=neo4j_config['uri'],
+                        neo4j_user=neo4j_config['user'],
+                        neo4j_pwd=neo4j_config['password'],
+                        top_k=top_k,
+                        driver=get_shared_driver(neo4j_config['uri'], neo4j_config['user'], neo4j_config['password'])
+                    )
+                    graph_rag.fetch_graph = instrument("GraphRAG.fetch_graph")(graph_rag.fetch_graph)
+                    print("✅ 图RAG系统初始化成功")
+                    return graph_rag
+                
+                self.graph_rag = _shared_component(
+                    ("plan", vector_config['persist_dir'], neo4j_config['uri'], neo4j_config['user'], top_k),
+                    create_graph_rag
+                )
             
         except Exception as e:
             print(f"⚠️ 组件初始化警告: {e}")
     
+    @instrument("UnifiedPRSystem.query_knowledge")
     def query_knowledge(self, query: str, use_graph: bool = True) -> str:
         """知识查询功能（来自现有RAG系统）"""
+        self._init_components("rag")
         try:
             if use_graph:
                 return self.rag_system.query(query, use_graph=True)
@@ -122,71 +307,167 @@ class UnifiedPRSystem:
         except Exception as e:
             return f"查询失败: {e}"
     
+    @instrument("UnifiedPRSystem.generate_pr_plan")
     def generate_pr_plan(self, enterprise_info: Dict[str, Any], output_types: List[str] = None) -> Dict[str, Any]:
-        """生成公关传播方案（来自pr_agent_v2）"""
-        if output_types is None:
-            output_types = ["A", "B", "C", "D", "E", "F"]
-        
+        """生成公关传播方案（来自pr_agent_v2，同步接口）"""
+        return asyncio.run(self.generate_pr_plan_async(enterprise_info, output_types))
+    
+    @instrument("UnifiedPRSystem.generate_pr_plan_async")
+    async def generate_pr_plan_async(self, enterprise_info: Dict[str, Any], output_types: List[str] = None) -> Dict[str, Any]:
+        """生成公关传播方案：各类产出的LLM调用互不依赖，并发发出，总耗时约等于最慢的一次调用"""
         try:
-            # 构建查询
-            query = f"{enterprise_info.get('enterprise_stage', '')} {enterprise_info.get('industry', '')} {enterprise_info.get('market_type', '')} 目标:{enterprise_info.get('pr_goal', '')} 创新:{enterprise_info.get('innovation', '')}"
-            
-            # 检索知识
-            vec_hits = self.graph_rag.retrieve(query, k=self.config['retrieval']['top_k'])
-            graph_data = self.graph_rag.fetch_graph(enterprise_info.get('pr_goal', ''))
-            
-            # 构建上下文
-            context_parts = []
-            for i, hit in enumerate(vec_hits, 1):
-                src = hit["meta"].get("source", "") if isinstance(hit["meta"], dict) else ""
-                context_parts.append(f"[{i}] {hit['text'][:800]}\n— 来源：{src}")
+            from pr_marketing_agent_v3 import llm_complete
             
-            graph_part = f"策略: {graph_data.get('strategies', [])}\n渠道: {graph_data.get('channels', [])}\n案例: {graph_data.get('cases', [])}\n人群: {graph_data.get('personas', [])}"
-            context = "\n\n".join(context_parts + [graph_part])[:self.config['retrieval']['max_context_chars']]
+            codes, results, prompts, shared_prefix, vars_text, partition = await self._prepare_plan(enterprise_info, output_types)
+            missing = list(prompts)
             
-            # 企业信息JSON
-            vars_text = json.dumps(enterprise_info, ensure_ascii=False)
+            # llm_complete是同步调用，放到线程中并发执行；取不到文本时抛出异常而不是返回兜底JSON，避免写入缓存
+            responses = await asyncio.gather(*(
+                asyncio.to_thread(llm_complete, self.llm_config['provider'], self.llm_config['model'], prompts[code],
+                                  self.llm_config['max_tokens'], self.llm_config['temperature'], shared_prefix, False)
+                for code in missing
+            ), return_exceptions=True)
             
-            # 生成方案
-            results = {}
-            provider = self.llm_config['provider']
-            model = self.llm_config['model']
-            max_tokens = self.llm_config['max_tokens']
-            temperature = self.llm_config['temperature']
+            # 先缓存成功的产出，再传播失败产出的异常
+            for code, response in zip(missing, responses):
+                if not isinstance(response, BaseException):
+                    results[code] = response
+                    self._cache_put(code, vars_text, response, partition)
+            for response in responses:
+                if isinstance(response, BaseException):
+                    raise response
             
-            if "A" in output_types:
-                results["A"] = llm_complete(provider, model, A_GRAPHIC_BRIEF.format(context=context, vars=vars_text), max_tokens, temperature)
+            return {code: results[code] for code in codes}
             
-            if "B" in output_types:
-                results["B"] = llm_complete(provider, model, B_VIDEO_SCRIPT.format(context=context, vars=vars_text), max_tokens, temperature)
-            
-            if "C" in output_types:
-                results["C"] = llm_complete(provider, model, C_CAMPAIGN_PLAN.format(context=context, vars=vars_text), max_tokens, temperature)
+        except Exception as e:
+            return {"error": f"方案生成失败: {e}"}
+    
+    async def generate_pr_plan_stream(self, enterprise_info: Dict[str, Any], output_types: List[str] = None) -> AsyncIterator[Tuple[str, str]]:
+        """流式生成公关传播方案：各产出并发生成，按产出代码顺序产出 (产出代码, 文本块)
+        
+        当前产出边生成边产出，其余产出的文本块先在各自队列中缓冲，轮到时再依次产出；缓存命中的产出整段产出
+        """
+        tasks = {}
+        try:
+            from pr_marketing_agent_v3 import llm_complete_stream
             
-            if "D" in output_types:
-                results["D"] = llm_complete(provider, model, D_SHORTVIDEO_SCRIPT.format(context=context, vars=vars_text), max_tokens, temperature)
+            codes, results, prompts, shared_prefix, vars_text, partition = await self._prepare_plan(enterprise_info, output_types)
             
-            if "E" in output_types:
-                results["E"] = llm_complete(provider, model, E_XHS_NOTE.format(context=context, vars=vars_text), max_tokens, temperature)
+            # 每个产出一个队列，None表示该产出结束
+            queues = {code: asyncio.Queue() for code in prompts}
             
-            if "F" in output_types:
-                results["F"] = llm_complete(provider, model, F_CRISIS_PLAN.format(context=context, vars=vars_text), max_tokens, temperature)
+            async def pump(code: str):
+                parts = []
+                try:
+                    async for chunk in llm_complete_stream(self.llm_config['provider'], self.llm_config['model'], prompts[code],
+                                                           self.llm_config['max_tokens'], self.llm_config['temperature'], shared_prefix):
+                        parts.append(chunk)
+                        await queues[code].put(chunk)
+                    # 只缓存完整生成的文本，出错或被取消的流不写入缓存
+                    self._cache_put(code, vars_text, "".join(parts), partition)
+                finally:
+                    await queues[code].put(None)
             
-            return results
+            tasks = {code: asyncio.create_task(pump(code)) for code in prompts}
+            for code in codes:
+                if code in results:
+                    yield code, results[code]
+                    continue
+                while (chunk := await queues[code].get()) is not None:
+                    yield code, chunk
+                # 传播该产出流中的异常
+                await tasks[code]
             
         except Exception as e:
-            return {"error": f"方案生成失败: {e}"}
+            yield "error", f"方案生成失败: {e}"
+        finally:
+            # 调用方提前停止迭代或出错时，取消仍在生成的产出
+            for task in tasks.values():
+                task.cancel()
     
+    @instrument("UnifiedPRSystem._prepare_plan")
+    async def _prepare_plan(self, enterprise_info: Dict[str, Any], output_types: Optional[List[str]]):
+        """方案生成的公共准备：检索知识、构建共用前缀，并查缓存
+        
+        Returns:
+            (请求的产出代码, 缓存命中的结果, 未命中产出的任务说明, 共用前缀, 企业信息JSON, 缓存分区)
+        """
+        if output_types is None:
+            output_types = ["A", "B", "C", "D", "E", "F"]
+        
+        # 只处理请求的产出
+        codes = [code for code in TASK_TEMPLATE_NAMES if code in output_types]
+        
+        # 企业信息JSON
+        vars_text = serialize_enterprise_info(enterprise_info)
+        if not codes:
+            return codes, {}, {}, "", vars_text, ""
+        
+        self._init_components("plan")
+        from pr_marketing_agent_v3 import build_context
+        from templates import prompts as prompt_templates
+        
+        # 构建查询
+        query = f"{enterprise_info.get('enterprise_stage', '')} {enterprise_info.get('industry', '')} {enterprise_info.get('market_type', '')} 目标:{enterprise_info.get('pr_goal', '')} 创新:{enterprise_info.get('innovation', '')}"
+        
+        # 检索知识：向量检索（Chroma）与图检索（Neo4j）互不依赖，并发执行
+        # 向量检索走批量接口：各产出改用各自的查询时仍只有一次Chroma查询
+        hits_per_query, graph_data = await asyncio.gather(
+            asyncio.to_thread(self.graph_rag.retrieve_batch, [query], k=self.config['retrieval']['top_k']),
+            asyncio.to_thread(self.graph_rag.fetch_graph, enterprise_info.get('pr_goal', ''))
+        )
+        
+        vec_hits = hits_per_query[0]
+        
+        # 构建上下文（拼接时即按长度上限停止）
+        context = build_context(vec_hits, graph_data, self.config['retrieval']['max_context_chars'])
+        
+        # 上下文和企业信息只渲染一次，作为各产出共用的前缀（可命中服务端前缀缓存），每次调用只附带各自的任务说明
+        shared_prefix = prompt_templates.render_shared_context(context=context, vars=vars_text)
+        
+        # 查缓存：分区包含检索上下文，知识库变化后不再命中旧方案；只有未命中的产出才调用LLM
+        partition = self._cache_partition(enterprise_info, context)
+        results = {}
+        if self.llm_cache:
+            for code in codes:
+                cached = self.llm_cache.get(code, self.llm_config['model'], vars_text, partition)
+                if cached is not None:
+                    results[code] = cached
+        prompts = {code: getattr(prompt_templates, TASK_TEMPLATE_NAMES[code]) for code in codes if code not in results}
+        
+        return codes, results, prompts, shared_prefix, vars_text, partition
+    
+    def _cache_partition(self, enterprise_info: Mapping[str, Any], context: str) -> str:
+        """缓存分区：企业名称、生成参数和检索上下文的摘要，只在同一分区内查找缓存
+        
+        企业信息JSON不计入分区（只用于精确键和相似度向量），同一分区内企业信息相近的请求才可能语义命中。
+        """
+        return dumps_text({
+            "enterprise_name": enterprise_info.get("enterprise_name", ""),
+            "provider": self.llm_config['provider'],
+            "temperature": self.llm_config['temperature'],
+            "max_tokens": self.llm_config['max_tokens'],
+            "context": hashlib.sha256(context.encode("utf-8")).hexdigest(),
+        })
+    
+    def _cache_put(self, code: str, vars_text: str, response: Any, partition: str):
+        """写入缓存，空响应或非文本响应不缓存"""
+        if self.llm_cache and isinstance(response, str) and response.strip():
+            self.llm_cache.put(code, self.llm_config['model'], vars_text, response, partition)
+    
+    @instrument("UnifiedPRSystem.analyze_entities")
     def analyze_entities(self, text: str) -> Dict[str, Any]:
         """实体分析功能"""
+        self._init_components("extractor")
         try:
-            entities = self.entity_extractor.extract_entities(text)
-            relationships = self.entity_extractor.extract_relationships(text)
+            # 实体和关系在一次调用中提取，共享同一遍处理
+            entities, relationships = self.entity_extractor.extract_both(text)
+            entity_count = sum(len(items) for items in entities.values())
             
             return {
                 "entities": entities,
                 "relationships": relationships,
-                "analysis_summary": f"识别到 {len(entities)} 个实体和 {len(relationships)} 个关系"
+                "analysis_summary": f"识别到 {entity_count} 个实体和 {len(relationships)} 个关系"
             }
         except Exception as e:
             return {"error": f"实体分析失败: {e}"}
@@ -194,11 +475,14 @@ class UnifiedPRSystem:
     def unified_query(self, query: str, mode: str = "auto") -> Dict[str, Any]:
         """统一查询接口"""
         try:
+            # 一次扫描得到全部关键词标签，模式判断和企业信息解析共用
+            tags = match_keywords(query)
+            
             # 自动判断查询类型
             if mode == "auto":
-                if any(keyword in query for keyword in ["方案", "策划", "计划", "生成"]):
+                if ("mode", "plan_generation") in tags:
                     mode = "plan_generation"
-                elif any(keyword in query for keyword in ["实体", "关系", "分析"]):
+                elif ("mode", "entity_analysis") in tags:
                     mode = "entity_analysis"
                 else:
                     mode = "knowledge_query"
@@ -216,7 +500,7 @@ class UnifiedPRSystem:
                 result["result"] = self.analyze_entities(query)
             elif mode == "plan_generation":
                 # 这里需要解析查询中的企业信息
-                enterprise_info = self._parse_enterprise_info(query)
+                enterprise_info = self._parse_enterprise_info(query, tags)
                 result["result"] = self.generate_pr_plan(enterprise_info)
             
             return result
@@ -229,39 +513,30 @@ class UnifiedPRSystem:
                 "timestamp": datetime.now().isoformat()
             }
     
-    def _parse_enterprise_info(self, query: str) -> Dict[str, Any]:
-        """从查询中解析企业信息"""
-        # 简单的解析逻辑，实际应用中可以使用更复杂的NLP
-        enterprise_info = {
-            "enterprise_name": "示例企业",
-            "enterprise_stage": "中小微企业",
-            "industry": "科技",
-            "market_type": "ToC",
-            "pr_goal": "品牌认知",
-            "pr_cycle": "3个月",
-            "pr_budget": "100万",
-            "innovation": "适度创新"
-        }
-        
-        # 尝试从查询中提取信息
-        if "初创" in query:
-            enterprise_info["enterprise_stage"] = "初创企业"
-        elif "大型" in query:
-            enterprise_info["enterprise_stage"] = "大型国企央企"
-        
-        if "ToB" in query:
-            enterprise_info["market_type"] = "ToB"
-        elif "ToG" in query:
-            enterprise_info["market_type"] = "ToG"
-        
-        return enterprise_info
+    def _parse_enterprise_info(self, query: str, tags: Optional[set] = None) -> Mapping[str, Any]:
+        """从查询中解析企业信息（tags为已匹配的关键词标签，未提供时重新匹配）"""
+        if tags is None:
+            tags = match_keywords(query)
+        return _enterprise_info_for_tags(frozenset(tags))
     
     def close(self):
-        """关闭系统"""
-        if self.graph_rag:
-            self.graph_rag.close()
+        """关闭系统（组件为进程内共享，由进程退出时统一关闭，这里只解除引用）"""
+        self.rag_system = None
+        self.graph_rag = None
+        self.entity_extractor = None
+        self.llm_cache = None
         print("✅ 系统已关闭")
 
+async def print_plan_stream(system: UnifiedPRSystem, enterprise_info: Dict[str, Any], output_types: List[str]):
+    """边生成边输出方案，各产出按顺序完整输出"""
+    current = None
+    async for plan_type, chunk in system.generate_pr_plan_stream(enterprise_info, output_types):
+        if plan_type != current:
+            print(f"\n\n{plan_type} 方案:")
+            current = plan_type
+        print(chunk, end="", flush=True)
+    print()
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description="统一公关传播智能体系统")
@@ -295,10 +570,8 @@ def main():
                 "pr_budget": "500万",
                 "innovation": "适度创新"
             }
-            result = system.generate_pr_plan(enterprise_info, ["A", "B", "C"])
             print("📄 生成的方案:")
-            for plan_type, content in result.items():
-                print(f"\n{plan_type} 方案:\n{content[:500]}...")
+            asyncio.run(print_plan_stream(system, enterprise_info, ["A", "B", "C"]))
         
         elif args.mode == "analyze" and args.query:
             print(f"🔬 执行实体分析: {args.query}")